@@ -2,6 +2,7 @@
 Authentication and authorization dependencies for FastAPI
 """
 
+from functools import cached_property
 from uuid import UUID
 
 from databases import Database
@@ -18,6 +19,18 @@ from app.loggs import log_auth_event, log_security_event
 settings = get_settings()
 security = HTTPBearer(scheme_name="BearerAuth", auto_error=False)
 
+# NOTE: do not forget to edit here for other resource
+_ADMIN_PERMISSIONS = frozenset(
+    {
+        "users:*",
+        "roles:*",
+        "permissions:*",
+        "system:*",
+        "admin:*",
+        "*",
+    }
+)
+
 
 class CurrentUser:
     """Current user information"""
@@ -34,32 +47,23 @@ class CurrentUser:
         self.permissions = permissions or []
         self._user_data = user_data
 
+    @cached_property
+    def permission_names(self) -> frozenset[str]:
+        """Names of the user's permissions, for O(1) membership checks"""
+        return frozenset(perm["name"] for perm in self.permissions)
+
     def has_permission(self, resource: str, action: str) -> bool:
         """Check if user has a specific permission"""
-        permission_name = f"{resource}:{action}"
-        return any(
-            perm["name"] == permission_name
-            or perm["name"] == f"{resource}:*"
-            or perm["name"] == "*"
-            for perm in self.permissions
+        names = self.permission_names
+        return (
+            f"{resource}:{action}" in names or f"{resource}:*" in names or "*" in names
         )
 
-    # NOTE: do not forget to edit here for other resource
     @property
     def is_admin(self) -> bool:
         """Check if user has admin permissions"""
         # Check if user has any admin-level permissions
-        admin_permissions = [
-            "users:*",
-            "roles:*",
-            "permissions:*",
-            "system:*",
-            "admin:*",
-        ]
-        return any(
-            perm["name"] in admin_permissions or perm["name"] == "*"
-            for perm in self.permissions
-        )
+        return not self.permission_names.isdisjoint(_ADMIN_PERMISSIONS)
 
     def to_dict(self) -> dict:
         """Convert to dictionary"""
@@ -179,27 +183,28 @@ async def require_verified_user(
 
 def require_any_role(*role_names: str) -> callable:
     """Dependency factory for requiring ANY of the given roles"""
+    required = frozenset(role_names)
+    detail = f"Requires one of the roles: {', '.join(role_names)}"
 
     async def role_dependency(
         current_user: CurrentUser = Depends(require_verified_user),
         db: Database = Depends(get_db),
     ) -> CurrentUser:
         user_roles = await RBACCRUD.get_user_roles(db, current_user.id)
-        user_role_names = [role["name"] for role in user_roles]
 
-        if not any(role in user_role_names for role in role_names):
+        if required.isdisjoint(role["name"] for role in user_roles):
             log_security_event(
                 event_type="role_access_denied",
                 severity="low",
                 details={
                     "user_id": str(current_user.id),
                     "required_roles": list(role_names),
-                    "user_roles": user_role_names,
+                    "user_roles": [role["name"] for role in user_roles],
                 },
             )
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
-                detail=f"Requires one of the roles: {', '.join(role_names)}",
+                detail=detail,
             )
 
         return current_user
@@ -287,6 +292,7 @@ def require_permissions(
 
 def require_role(role_name: str) -> callable:
     """Dependency factory for requiring a specific role"""
+    detail = f"Role '{role_name}' required"
 
     async def role_dependency(
         current_user: CurrentUser = Depends(require_verified_user),
@@ -306,7 +312,7 @@ def require_role(role_name: str) -> callable:
             )
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
-                detail=f"Role '{role_name}' required",
+                detail=detail,
             )
 
         return current_user
@@ -1,3 +1,4 @@
+import asyncio
 import base64
 from datetime import UTC, datetime, timedelta
 
@@ -13,16 +14,18 @@ settings = get_auth_settings()
 auth_scheme = OAuth2PasswordBearer(tokenUrl="/users/login")
 
 
+# Argon2 is CPU-bound by design; run it off the event loop
+ph = PasswordHasher()
+
+
 async def hash_password(plan_password: str):
-    ph = PasswordHasher()
-    hashed_password = ph.hash(plan_password)
+    hashed_password = await asyncio.to_thread(ph.hash, plan_password)
     return hashed_password
 
 
 async def verify_password(hashed_password: str, plan_password: str):
-    ph = PasswordHasher()
     try:
-        ph.verify(hashed_password, plan_password)
+        await asyncio.to_thread(ph.verify, hashed_password, plan_password)
         return True
     except Exception:
         return False
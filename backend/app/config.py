@@ -3,8 +3,11 @@ appointement_booking_app - Application Configuration
 Generated from FastAPI Production Boilerplate
 """
 
+from functools import cached_property
 from typing import Annotated, Any, Literal
+from urllib.parse import quote_plus
 
+import orjson
 from pydantic import (AnyUrl, BeforeValidator, PostgresDsn, computed_field,
                       model_validator)
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -48,11 +51,9 @@ def parse_hosts(v: Any) -> list[str]:
             return []
         # Try JSON first
         if v.startswith("["):
-            import json
-
             try:
-                return json.loads(v)
-            except (json.JSONDecodeError, ValueError):
+                return orjson.loads(v)
+            except orjson.JSONDecodeError:
                 pass
         # Fall back to comma-separated
         return [host.strip() for host in v.split(",") if host.strip()]
@@ -62,6 +63,18 @@ def parse_hosts(v: Any) -> list[str]:
         raise ValueError(f"Invalid allowed hosts format: {v}")
 
 
+# Known placeholder values that must never be used as real secrets
+_WEAK_SECRETS = frozenset(
+    {
+        "secret",
+        "changethis",
+        "CHANGE_ME_TO_STRONG_SECRET_32_CHARS_MIN",
+        "CHANGE_ME_TO_STRONG_PASSWORD_32_CHARS_MIN",
+        "",
+    }
+)
+
+
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(
         env_file=".env", env_ignore_empty=True, extra="ignore"
@@ -87,6 +100,8 @@ class Settings(BaseSettings):
     JWT_ISSUER: str | None = None
     JWT_AUDIENCE: str | None = None
     JWT_DENYLIST_ENABLED: bool = True  # Enable token denylist for logout
+    # Seconds a "not revoked" answer is trusted per process before asking Redis again
+    JWT_DENYLIST_NEGATIVE_TTL: int = 5
 
     # --------------------
     # DATABASE
@@ -97,6 +112,9 @@ class Settings(BaseSettings):
     POSTGRES_USER: str
     POSTGRES_PASSWORD: str
     POSTGRES_DB: str
+    DB_POOL_MIN_SIZE: int = 5
+    DB_POOL_MAX_SIZE: int = 20
+    DB_STATEMENT_CACHE_SIZE: int = 1024  # asyncpg prepared statements per connection
 
     @computed_field  # type: ignore[misc]
     @property
@@ -115,6 +133,15 @@ class Settings(BaseSettings):
     REDIS_SSL: bool = False
     CACHE_TTL: int = 300
     CACHE_PREFIX: str = "mocaad"
+    # Hash used for response-cache ETags; "sha256" keeps the previous format
+    ETAG_ALGO: Literal["xxh3", "sha256"] = "xxh3"
+
+    @computed_field  # type: ignore[misc]
+    @property
+    def REDIS_URL(self) -> str:
+        # Quote the password so characters like '@' or '/' don't break the URL
+        auth = f":{quote_plus(self.REDIS_PASSWORD)}@" if self.REDIS_PASSWORD else ""
+        return f"redis://{auth}{self.REDIS_HOST}:{self.REDIS_PORT}/{self.REDIS_DB}"
 
     # --------------------
     # RATE LIMITING
@@ -224,18 +251,10 @@ class Settings(BaseSettings):
         - Enforce minimum length of 32 characters for cryptographic keys
         - In local env, warn; in non-local envs, raise to fail-fast
         """
-        weak_values = {
-            "secret",
-            "changethis",
-            "CHANGE_ME_TO_STRONG_SECRET_32_CHARS_MIN",
-            "CHANGE_ME_TO_STRONG_PASSWORD_32_CHARS_MIN",
-            "",
-            None,
-        }
         message = None
-        if value in weak_values:
+        if value is None or value in _WEAK_SECRETS:
             message = f"The value of {var_name} is a weak default. Please set a strong secret."
-        elif isinstance(value, str) and len(value) < 32:
+        elif len(value) < 32:
             message = f"The value of {var_name} is too short (min 32 chars)."
 
         if message:
@@ -268,6 +287,19 @@ class Settings(BaseSettings):
     def is_production(self) -> bool:
         return self.ENVIRONMENT == "production"
 
+    # Frozen views for per-request membership checks in the security middleware
+    @cached_property
+    def ALLOWED_HOSTS_SET(self) -> frozenset[str]:
+        return frozenset(self.ALLOWED_HOSTS)
+
+    @cached_property
+    def ALLOWED_HOSTS_WILDCARD(self) -> bool:
+        return "*" in self.ALLOWED_HOSTS_SET
+
+    @cached_property
+    def TRUSTED_PROXIES_SET(self) -> frozenset[str]:
+        return frozenset(self.TRUSTED_PROXIES)
+
 
 settings = Settings()
 
@@ -1,17 +1,53 @@
+import asyncio
 import json
-import pickle
-from collections.abc import Callable
-from datetime import timedelta
-from functools import wraps
-from typing import Any
-
-import redis.asyncio as redis
+from collections.abc import Awaitable, Callable, Iterable
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from functools import lru_cache, wraps
+from typing import TYPE_CHECKING, Any
+from uuid import UUID
+
+import msgpack
+import orjson
 from loguru import logger
 
 from app.config import get_settings
 
+if TYPE_CHECKING:
+    # redis.asyncio is imported lazily in connect() to keep cold imports cheap
+    import redis.asyncio as redis
+    from redis.asyncio.client import PubSub
+
 settings = get_settings()
 
+# One-byte prefixes identifying how a cached value was serialized, so reads
+# don't have to guess (and raise) their way through each format.
+_TAG_ORJSON = b"o"
+_TAG_MSGPACK = b"m"
+# Legacy tags: still readable, no longer written
+_TAG_JSON = b"j"
+_TAG_PICKLE = b"p"
+
+
+def _orjson_default(obj: Any) -> Any:
+    """Serialize types orjson doesn't handle natively"""
+    if isinstance(obj, Decimal):
+        return str(obj)
+    if isinstance(obj, set | frozenset):
+        return list(obj)
+    raise TypeError
+
+
+def _msgpack_default(obj: Any) -> Any:
+    """Serialize types msgpack doesn't handle natively"""
+    if isinstance(obj, datetime | date | time):
+        return obj.isoformat()
+    if isinstance(obj, UUID | Decimal):
+        return str(obj)
+    if isinstance(obj, set | frozenset):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not cacheable")
+
 
 class CacheManager:
     """Redis cache manager with async support"""
@@ -19,21 +55,33 @@ class CacheManager:
     def __init__(self):
         self._redis: redis.Redis | None = None
         self._connected = False
+        # One pub/sub connection per process, fanned out to local waiters
+        self._pubsub: PubSub | None = None
+        self._waiters: dict[str, set[asyncio.Future]] = {}
+        self._listener: asyncio.Task | None = None
 
     async def connect(self):
         """Connect to Redis"""
-        try:
-            # Build Redis URL from settings
-            redis_url = f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}/{settings.REDIS_DB}"
-            if settings.REDIS_PASSWORD:
-                redis_url = f"redis://:{settings.REDIS_PASSWORD}@{settings.REDIS_HOST}:{settings.REDIS_PORT}/{settings.REDIS_DB}"
+        import redis.asyncio as redis
+        from redis.asyncio.retry import Retry
+        from redis.backoff import ExponentialBackoff
 
+        try:
+            # hiredis (when installed) is picked up automatically as the parser;
+            # RESP3 gives typed replies without extra Python-side coercion.
             self._redis = redis.from_url(
-                redis_url,
+                settings.REDIS_URL,
+                protocol=3,
                 encoding="utf-8",
-                decode_responses=True,
+                # Values are deserialized straight from bytes, so skip the
+                # per-reply UTF-8 decode
+                decode_responses=False,
+                max_connections=32,
+                single_connection_client=False,
                 socket_connect_timeout=5,
                 socket_timeout=5,
+                # Back off between retries so a blip doesn't stampede Redis
+                retry=Retry(ExponentialBackoff(cap=0.2), retries=3),
                 retry_on_timeout=True,
                 health_check_interval=30,
             )
@@ -48,6 +96,12 @@ class CacheManager:
 
     async def disconnect(self):
         """Disconnect from Redis"""
+        if self._listener:
+            self._listener.cancel()
+            self._listener = None
+        if self._pubsub:
+            await self._pubsub.aclose()
+            self._pubsub = None
         if self._redis:
             await self._redis.close()
             self._connected = False
@@ -62,6 +116,55 @@ class CacheManager:
         """Create a prefixed cache key"""
         return f"{settings.CACHE_PREFIX}:{key}"
 
+    @staticmethod
+    def _packb(value: Any) -> bytes:
+        return _TAG_MSGPACK + msgpack.packb(
+            value, use_bin_type=True, default=_msgpack_default
+        )
+
+    @classmethod
+    def _encode(cls, value: Any) -> bytes:
+        """Serialize a value, prefixed with a one-byte format tag"""
+        # Binary payloads (e.g. cached response bodies) go straight to msgpack
+        # rather than letting orjson get partway through and then fail
+        if isinstance(value, bytes) or (
+            isinstance(value, dict)
+            and any(isinstance(v, bytes) for v in value.values())
+        ):
+            return cls._packb(value)
+        try:
+            return _TAG_ORJSON + orjson.dumps(value, default=_orjson_default)
+        except TypeError:
+            # e.g. nested bytes or non-string dict keys, which msgpack preserves
+            return cls._packb(value)
+
+    @staticmethod
+    def _decode(value: bytes) -> Any:
+        """Deserialize a stored value by dispatching on its format tag"""
+        tag, payload = value[:1], value[1:]
+        if tag == _TAG_ORJSON:
+            return orjson.loads(payload)
+        if tag == _TAG_MSGPACK:
+            return msgpack.unpackb(payload, raw=False, strict_map_key=False)
+        if tag == _TAG_JSON:
+            return json.loads(payload)
+        # Only legacy entries can still be pickled, so import it on demand
+        import pickle
+
+        if tag == _TAG_PICKLE:
+            return pickle.loads(payload)
+
+        # Legacy untagged values, written as text (pickles as latin1 text)
+        # before format tags were introduced
+        text = value.decode()
+        try:
+            return json.loads(text)
+        except (json.JSONDecodeError, TypeError):
+            try:
+                return pickle.loads(text.encode("latin1"))
+            except Exception:
+                return text
+
     async def get(self, key: str) -> Any | None:
         """Get a value from cache"""
         if not self.is_connected:
@@ -72,15 +175,7 @@ class CacheManager:
             value = await self._redis.get(prefixed_key)
             if value is None:
                 return None
-
-            # Try to deserialize as JSON first, then pickle
-            try:
-                return json.loads(value)
-            except (json.JSONDecodeError, TypeError):
-                try:
-                    return pickle.loads(value.encode("latin1"))
-                except Exception:
-                    return value
+            return self._decode(value)
 
         except Exception as e:
             logger.warning(f"Cache get failed for key {key}: {e}")
@@ -96,12 +191,7 @@ class CacheManager:
         try:
             prefixed_key = self._make_key(key)
 
-            # Serialize value
-            try:
-                serialized_value = json.dumps(value)
-            except (TypeError, ValueError):
-                # Fall back to pickle for complex objects
-                serialized_value = pickle.dumps(value).decode("latin1")
+            serialized_value = self._encode(value)
 
             # Set TTL
             if ttl is None:
@@ -116,6 +206,42 @@ class CacheManager:
             logger.warning(f"Cache set failed for key {key}: {e}")
             return False
 
+    async def mget(self, keys: list[str]) -> list[Any | None]:
+        """Get several values in one round-trip, aligned with `keys`"""
+        if not self.is_connected or not keys:
+            return [None] * len(keys)
+
+        try:
+            values = await self._redis.mget([self._make_key(key) for key in keys])
+            return [None if value is None else self._decode(value) for value in values]
+        except Exception as e:
+            logger.warning(f"Cache mget failed for {len(keys)} keys: {e}")
+            return [None] * len(keys)
+
+    async def mset(
+        self, mapping: dict[str, Any], ttl: int | timedelta | None = None
+    ) -> bool:
+        """Set several values with the same TTL in one pipelined round-trip"""
+        if not self.is_connected:
+            return False
+        if not mapping:
+            return True
+
+        try:
+            if ttl is None:
+                ttl = settings.CACHE_TTL
+            elif isinstance(ttl, timedelta):
+                ttl = int(ttl.total_seconds())
+
+            async with self._redis.pipeline(transaction=False) as pipe:
+                for key, value in mapping.items():
+                    pipe.setex(self._make_key(key), ttl, self._encode(value))
+                await pipe.execute()
+            return True
+        except Exception as e:
+            logger.warning(f"Cache mset failed for {len(mapping)} keys: {e}")
+            return False
+
     async def delete(self, key: str) -> bool:
         """Delete a key from cache"""
         if not self.is_connected:
@@ -233,11 +359,87 @@ class CacheManager:
         except Exception as e:
             logger.warning(f"Cache release_lock failed for key {key}: {e}")
 
+    async def publish(self, key: str) -> None:
+        """Wake workers blocked in `wait_for` on this key"""
+        if not self.is_connected:
+            return
+        try:
+            await self._redis.publish(self._make_key(f"filled:{key}"), b"1")
+        except Exception as e:
+            logger.warning(f"Cache publish failed for key {key}: {e}")
+
+    async def wait_for(self, key: str, timeout: float = 1.0) -> Any | None:
+        """Wait up to `timeout` seconds for another worker to fill `key`.
+
+        Returns the cached value, or None if it didn't arrive in time.
+        """
+        if not self.is_connected:
+            return None
+
+        channel = self._make_key(f"filled:{key}")
+        future = asyncio.get_running_loop().create_future()
+        waiters = self._waiters.setdefault(channel, set())
+        waiters.add(future)
+        try:
+            if len(waiters) == 1:
+                if self._pubsub is None:
+                    self._pubsub = self._redis.pubsub()
+                await self._pubsub.subscribe(channel)
+                if self._listener is None or self._listener.done():
+                    self._listener = asyncio.create_task(self._listen())
+            # The value may have been written before we subscribed
+            value = await self.get(key)
+            if value is not None:
+                return value
+            await asyncio.wait_for(future, timeout)
+            return await self.get(key)
+        except TimeoutError:
+            return None
+        except Exception as e:
+            logger.warning(f"Cache wait_for failed for key {key}: {e}")
+            return None
+        finally:
+            waiters.discard(future)
+            if not waiters and self._waiters.get(channel) is waiters:
+                del self._waiters[channel]
+                try:
+                    await self._pubsub.unsubscribe(channel)
+                except Exception:
+                    pass
+
+    async def _listen(self) -> None:
+        """Resolve local waiters as fill notifications arrive"""
+        try:
+            while self._waiters:
+                message = await self._pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=1.0
+                )
+                if message is None:
+                    continue
+                channel = message["channel"]
+                if isinstance(channel, bytes):
+                    channel = channel.decode()
+                for future in self._waiters.get(channel, ()):
+                    if not future.done():
+                        future.set_result(None)
+        except Exception as e:
+            logger.warning(f"Cache pub/sub listener stopped: {e}")
+
 
 # Global cache manager instance
 cache_manager = CacheManager()
 
 
+# Argument types the default key builder can cheaply turn into a cache key
+_CACHEABLE_ARG_TYPES = (int, float, bool, str, bytes, UUID, tuple, type(None))
+
+
+@lru_cache(maxsize=256)
+def _log_cache_bypass(func_name: str) -> None:
+    """Log (once per function) that a call skipped the cache"""
+    logger.debug(f"Cache bypassed for {func_name}: non-primitive arguments")
+
+
 def cache(
     key_prefix: str,
     ttl: int | timedelta | None = None,
@@ -249,7 +451,14 @@ def cache(
     Args:
         key_prefix: Prefix for cache key
         ttl: Time to live for cached value
-        key_builder: Custom function to build cache key from function args
+        key_builder: Custom function to build cache key from function args;
+            returning None skips the cache for that call
+
+    Without a key_builder, calls with non-primitive arguments (ORM objects,
+    dicts, ...) bypass the cache entirely.
+
+    Each decorated call costs one Redis round-trip; to resolve many items at
+    once (e.g. names for a list of user ids) use `gather_cached` instead.
     """
 
     def decorator(func: Callable) -> Callable:
@@ -257,8 +466,22 @@ def cache(
         async def wrapper(*args, **kwargs):
             # Build cache key
             if key_builder:
-                cache_key = f"{key_prefix}:{key_builder(*args, **kwargs)}"
+                built_key = key_builder(*args, **kwargs)
+                if built_key is None:
+                    # key_builder marked this call as uncacheable
+                    return await func(*args, **kwargs)
+                cache_key = f"{key_prefix}:{built_key}"
             else:
+                # Stringifying ORM objects or blobs into a key can cost more
+                # than the call itself, so only cache primitive arguments
+                if not all(
+                    isinstance(a, _CACHEABLE_ARG_TYPES) for a in args
+                ) or not all(
+                    isinstance(v, _CACHEABLE_ARG_TYPES) for v in kwargs.values()
+                ):
+                    _log_cache_bypass(func.__qualname__)
+                    return await func(*args, **kwargs)
+
                 # Default key building from function name and args
                 args_str = "_".join(str(arg) for arg in args)
                 kwargs_str = "_".join(f"{k}={v}" for k, v in kwargs.items())
@@ -279,6 +502,40 @@ def cache(
     return decorator
 
 
+async def gather_cached(
+    func: Callable[[Any], Awaitable[Any]],
+    items: Iterable[Any],
+    key_builder: Callable[[Any], str],
+    ttl: int | timedelta | None = None,
+) -> list[Any]:
+    """
+    Resolve `func(item)` for every item, reading the cache with a single MGET
+
+    Only the misses are computed (concurrently) and written back in one
+    pipelined round-trip. Results are returned in the order of `items`.
+
+    Example:
+        names = await gather_cached(
+            get_user_name, user_ids, key_builder=lambda i: f"user:{i}:name"
+        )
+    """
+    items = list(items)
+    keys = [key_builder(item) for item in items]
+    results = await cache_manager.mget(keys)
+
+    missing = [i for i, value in enumerate(results) if value is None]
+    if missing:
+        computed = await asyncio.gather(*(func(items[i]) for i in missing))
+        to_store = {}
+        for i, value in zip(missing, computed, strict=True):
+            results[i] = value
+            if value is not None:
+                to_store[keys[i]] = value
+        await cache_manager.mset(to_store, ttl)
+
+    return results
+
+
 def cache_key_for_user(user_id: str | int, suffix: str = "") -> str:
     """Generate a cache key for user-specific data"""
     key = f"user:{user_id}"
@@ -2,53 +2,60 @@
 CSRF Protection for FastAPI application
 """
 
-import secrets
+import hashlib
+import hmac
+import time
 
 from fastapi import HTTPException, Request, status
 from loguru import logger
 
 from app.config import get_settings
-from app.core.cache import cache_manager
 
 settings = get_settings()
 
-CSRF_TOKEN_LENGTH = 32
 CSRF_TOKEN_TTL = 3600  # 1 hour
 
+_CSRF_KEY = settings.SECRET_KEY.encode()
 
-def generate_csrf_token() -> str:
-    """Generate a cryptographically secure CSRF token"""
-    return secrets.token_urlsafe(CSRF_TOKEN_LENGTH)
 
+def _sign(session_id: str, expires_at: int) -> str:
+    """HMAC-SHA256 over the session id and expiry, keyed with SECRET_KEY"""
+    message = f"{session_id}.{expires_at}".encode()
+    return hmac.new(_CSRF_KEY, message, hashlib.sha256).hexdigest()
 
-async def store_csrf_token(token: str, session_id: str) -> bool:
-    """Store CSRF token in cache with TTL"""
-    try:
-        key = f"csrf:token:{session_id}"
-        return await cache_manager.set(key, token, ttl=CSRF_TOKEN_TTL)
-    except Exception as e:
-        logger.error(f"Failed to store CSRF token: {e}")
-        return False
+
+def generate_csrf_token(session_id: str) -> str:
+    """Generate a signed CSRF token bound to a session
+
+    The token is `{expires_at}.{signature}`; it is verified by recomputing
+    the signature, so nothing needs to be stored server-side.
+    """
+    expires_at = int(time.time()) + CSRF_TOKEN_TTL
+    return f"{expires_at}.{_sign(session_id, expires_at)}"
 
 
-async def verify_csrf_token(token: str, session_id: str) -> bool:
-    """Verify CSRF token from cache"""
-    if not token or not session_id:
+def verify_csrf_token(token: str, session_id: str) -> bool:
+    """Verify a signed CSRF token for the given session"""
+    # Form fields can be UploadFile, and header values may hold any latin-1 text
+    if not isinstance(token, str) or not token or not session_id:
         return False
 
+    expires_at, _, signature = token.partition(".")
     try:
-        key = f"csrf:token:{session_id}"
-        stored_token = await cache_manager.get(key)
-        if not stored_token:
-            logger.warning(f"CSRF token not found for session: {session_id}")
-            return False
-
-        # Constant-time comparison to prevent timing attacks
-        return secrets.compare_digest(token, stored_token)
-    except Exception as e:
-        logger.error(f"CSRF token verification failed: {e}")
+        expires_at = int(expires_at)
+    except ValueError:
         return False
 
+    if expires_at < time.time():
+        logger.warning(f"CSRF token expired for session: {session_id}")
+        return False
+
+    # Constant-time comparison to prevent timing attacks; compare bytes, since
+    # compare_digest rejects str arguments containing non-ASCII characters
+    return hmac.compare_digest(
+        signature.encode(), _sign(session_id, expires_at).encode()
+    )
+
 
 async def validate_csrf_token(request: Request, session_id: str) -> None:
     """Validate CSRF token from request headers or form data"""
@@ -74,11 +81,10 @@ async def validate_csrf_token(request: Request, session_id: str) -> None:
         )
 
     # Verify token
-    is_valid = await verify_csrf_token(token, session_id)
+    is_valid = verify_csrf_token(token, session_id)
     if not is_valid:
         logger.warning(f"CSRF token invalid for session: {session_id}")
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="CSRF token invalid",
         )
-
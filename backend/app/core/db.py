@@ -1,7 +1,10 @@
 """Database engine and initialization utilities for SQLModel."""
 
 import logging
+from functools import lru_cache
 
+from sqlalchemy import Engine
+from sqlalchemy.pool import NullPool
 from sqlmodel import Session, create_engine, select
 
 from app import crud
@@ -22,8 +25,14 @@ def get_sync_database_uri() -> str:
     return uri
 
 
-# Create sync engine for SQLModel operations
-engine = create_engine(get_sync_database_uri())
+@lru_cache(maxsize=1)
+def get_sync_engine() -> Engine:
+    """Lazily create the sync engine used for one-shot startup tasks.
+
+    NullPool means no idle connections are kept around after init; the
+    runtime app talks to the database through the async `databases` pool.
+    """
+    return create_engine(get_sync_database_uri(), poolclass=NullPool)
 
 
 def init_db(session: Session) -> None:
@@ -33,12 +42,12 @@ def init_db(session: Session) -> None:
         logger.info("No FIRST_SUPERUSER configured, skipping superuser creation")
         return
 
-    # Check if superuser already exists
-    user = session.exec(
-        select(User).where(User.email == settings.FIRST_SUPERUSER)
+    # Check if superuser already exists (id only, no need to load the full row)
+    user_id = session.exec(
+        select(User.id).where(User.email == settings.FIRST_SUPERUSER).limit(1)
     ).first()
 
-    if not user:
+    if user_id is None:
         logger.info(f"Creating first superuser: {settings.FIRST_SUPERUSER}")
         user_in = UserCreate(
             email=settings.FIRST_SUPERUSER,
@@ -48,5 +57,5 @@ def init_db(session: Session) -> None:
         user = crud.create_user(session=session, user_create=user_in)
         logger.info(f"First superuser created: {user.email}")
     else:
-        logger.info(f"First superuser already exists: {user.email}")
+        logger.info(f"First superuser already exists: {settings.FIRST_SUPERUSER}")
 
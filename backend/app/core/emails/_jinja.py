@@ -0,0 +1,30 @@
+from functools import lru_cache
+
+from jinja2 import Environment, FileSystemLoader, Template, select_autoescape
+
+from app.config import get_settings
+from app.core.emails.email_config import EmailConfig
+
+settings = get_settings()
+
+# Single template environment for all email senders. Template files only
+# change on deploy, so skip the per-render stat outside development.
+env = Environment(
+    loader=FileSystemLoader(EmailConfig.TEMPLATE_FOLDER),
+    autoescape=select_autoescape(["html", "xml"]),
+    auto_reload=settings.is_development,
+    cache_size=400,
+)
+
+
+@lru_cache(maxsize=64)
+def _load_template(name: str) -> Template:
+    return env.get_template(name)
+
+
+def get_template(name: str) -> Template:
+    """Return the compiled template for `name`, memoized by name"""
+    if env.auto_reload:
+        # Development: let Jinja pick up template edits
+        return env.get_template(name)
+    return _load_template(name)
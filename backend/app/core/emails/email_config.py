@@ -1,5 +1,7 @@
+from dataclasses import dataclass
 from functools import lru_cache
 from pathlib import Path
+from typing import ClassVar
 
 from pydantic import SecretStr
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -19,10 +21,29 @@ class EmailConfig(BaseSettings):
     MAIL_PASSWORD: SecretStr
     MAIL_FROM: str = "noreply@example.com"
     MAIL_FROM_NAME: str = "MyApp"
-    TEMPLATE_FOLDER: Path = Path(__file__).parent.parent.parent / "templates"
+    # Constant, so kept out of the validated settings fields
+    TEMPLATE_FOLDER: ClassVar[Path] = Path(__file__).resolve().parents[2] / "templates"
 
 
 @lru_cache
 def get_email_settings() -> EmailConfig:
     """Return cached email settings"""
     return EmailConfig()
+
+
+@dataclass(slots=True, frozen=True)
+class EmailRuntime:
+    """Plain values read on every send, resolved once from EmailConfig"""
+
+    from_header: str
+    api_key: str
+
+
+@lru_cache
+def get_runtime_email() -> EmailRuntime:
+    """Return cached send-time email values"""
+    s = get_email_settings()
+    return EmailRuntime(
+        from_header=f"{s.MAIL_FROM_NAME} <{s.MAIL_FROM}>",
+        api_key=s.MAIL_PASSWORD.get_secret_value(),
+    )
@@ -1,10 +1,33 @@
+from functools import lru_cache
+from types import MappingProxyType
+
 import httpx
+import orjson
 from fastapi import BackgroundTasks
-from jinja2 import Environment, FileSystemLoader, select_autoescape
 
-from app.core.emails.email_config import get_email_settings
+from app.core.emails._jinja import env, get_template
+from app.core.emails.email_config import get_runtime_email
+
+# Shared HTTP client so connections (and TLS sessions) to Resend are reused
+_client: httpx.AsyncClient | None = None
+
+
+def _get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=10,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=50),
+        )
+    return _client
+
 
-email_settings = get_email_settings()
+async def close_email_client() -> None:
+    """Close the shared HTTP client (called on app shutdown)"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
 
 
 class EmailService:
@@ -13,23 +36,25 @@ class EmailService:
     RESEND_URL = "https://api.resend.com/emails"
 
     def __init__(self):
-        self.api_key = email_settings.MAIL_PASSWORD.get_secret_value()
-        self.from_header = (
-            f"{email_settings.MAIL_FROM_NAME} <{email_settings.MAIL_FROM}>"
-        )
+        rt = get_runtime_email()
+        self.api_key = rt.api_key
+        self.from_header = rt.from_header
+        self.headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
 
     async def _send(self, data: dict):
-        async with httpx.AsyncClient(timeout=10) as client:
-            response = await client.post(
-                self.RESEND_URL,
-                headers={"Authorization": f"Bearer {self.api_key}"},
-                json=data,
-            )
+        response = await _get_client().post(
+            self.RESEND_URL,
+            headers=self.headers,
+            content=orjson.dumps(data),
+        )
 
-            if response.status_code >= 400:
-                print("❌ Resend Error:", response.text)
+        if response.status_code >= 400:
+            print("❌ Resend Error:", response.text)
 
-            response.raise_for_status()
+        response.raise_for_status()
 
     def schedule_send(
         self,
@@ -48,18 +73,35 @@ class EmailService:
         background_tasks.add_task(self._send, data)
 
 
-email_service = EmailService()
+@lru_cache
+def get_email_service() -> EmailService:
+    """Return the shared EmailService, built on first send"""
+    return EmailService()
 
 
-# -------------------------------------------------------
-# Jinja2 template engine
-# -------------------------------------------------------
-jinja_env = Environment(
-    loader=FileSystemLoader(email_settings.TEMPLATE_FOLDER),
-    autoescape=select_autoescape(["html", "xml"]),
+_DEFAULT_TEMPLATE = "user/account-invite-inline.html"
+_TEMPLATE_MAPPING = MappingProxyType(
+    {
+        "account_invite": _DEFAULT_TEMPLATE,
+        "account_verification": "user/account-verification-inline.html",
+        "password_reset": "user/password-reset-inline.html",
+        "account_verification_confirmation": "user/account-verification-confirmation-inline.html",
+    }
 )
 
 
+def warm_email_templates() -> None:
+    """Compile the known email templates into get_template's cache before
+    the first send.
+
+    Skipped in development so template edits are picked up on each send.
+    """
+    if env.auto_reload:
+        return
+    for name in set(_TEMPLATE_MAPPING.values()):
+        get_template(name)
+
+
 async def send_email(
     recipients: str | list[str],
     subject: str,
@@ -74,17 +116,12 @@ async def send_email(
         recipients = [recipients]
 
     template_path = template_name or _map_email_type_to_template(email_type)
-    template = jinja_env.get_template(template_path)
-    html_content = template.render(**context)
+    html_content = get_template(template_path).render(context)
 
-    email_service.schedule_send(recipients, subject, html_content, background_tasks)
+    get_email_service().schedule_send(
+        recipients, subject, html_content, background_tasks
+    )
 
 
 def _map_email_type_to_template(email_type: str | None) -> str:
-    mapping = {
-        "account_invite": "user/account-invite-inline.html",
-        "account_verification": "user/account-verification-inline.html",
-        "password_reset": "user/password-reset-inline.html",
-        "account_verification_confirmation": "user/account-verification-confirmation-inline.html",
-    }
-    return mapping.get(email_type, "user/account-invite-inline.html")
+    return _TEMPLATE_MAPPING.get(email_type, _DEFAULT_TEMPLATE)
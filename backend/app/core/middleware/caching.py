@@ -2,14 +2,14 @@
 Response caching middleware for FastAPI application
 """
 
-import asyncio
 import hashlib
-from collections.abc import Callable
+from dataclasses import dataclass
 from datetime import UTC
-from typing import Any
 
+import xxhash
 from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.config import get_settings
 from app.core.cache import cache_manager
@@ -17,20 +17,47 @@ from app.loggs import log_cache_event
 
 settings = get_settings()
 
+# Request headers always folded into the cache key
+_DEFAULT_VARY_HEADERS = frozenset({b"accept", b"accept-language", b"accept-encoding"})
 
-class ResponseCachingMiddleware(BaseHTTPMiddleware):
+# Cache-Control directives that forbid storing a response
+_NO_CACHE_DIRECTIVES = frozenset({"no-cache", "no-store"})
+
+
+def _parse_cache_control(value: str) -> dict[str, str | None]:
+    """Split a Cache-Control header into lowercased directive -> value"""
+    directives: dict[str, str | None] = {}
+    for part in value.split(","):
+        name, sep, arg = part.partition("=")
+        name = name.strip().lower()
+        if name:
+            directives[name] = arg.strip().strip('"') if sep else None
+    return directives
+
+
+@dataclass(slots=True, frozen=True)
+class CacheConfig:
+    """Per-endpoint cache settings, resolved once by @cache_response"""
+
+    ttl: int
+    key_prefix: bytes
+    vary_on_user: bool
+    vary_on_headers: tuple[str, ...]  # lowercased
+
+
+class ResponseCachingMiddleware:
     """Middleware for caching HTTP responses"""
 
     def __init__(
         self,
-        app,
+        app: ASGIApp,
         default_ttl: int = 300,  # 5 minutes
         cacheable_methods: set[str] = None,  # pyright: ignore[reportArgumentType]
         cacheable_status_codes: set[int] = None,  # pyright: ignore[reportArgumentType]
         cache_private: bool = False,
         respect_decorator: bool = True,
     ):
-        super().__init__(app)
+        self.app = app
         self.default_ttl = default_ttl
         self.cacheable_methods = cacheable_methods or {"GET", "HEAD"}
         self.cacheable_status_codes = cacheable_status_codes or {
@@ -51,23 +78,30 @@ class ResponseCachingMiddleware(BaseHTTPMiddleware):
         self.cache_private = cache_private
         self.respect_decorator = respect_decorator
 
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        # Only cache if method is cacheable
-        if request.method not in self.cacheable_methods:
-            return await call_next(request)
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # Only cache if method is cacheable; everything else goes straight
+        # through without any request/stream wrapping
+        if scope["type"] != "http" or scope["method"] not in self.cacheable_methods:
+            await self.app(scope, receive, send)
+            return
+
+        request = Request(scope, receive)
 
         # Resolve route-specific cache config if present
         route_cfg = self._get_route_cache_config(request)
 
-        # Two-phase key: derive base key (no headers), get vary headers (from meta), then final key
+        # Fetch the vary meta and the base-key entry together; only responses
+        # that declared extra Vary headers need a second lookup
         base_key = self._generate_cache_key(request, route_cfg, vary_headers=[])
-        vary_headers = await self._load_vary_headers(base_key)
-        cache_key = self._generate_cache_key(
-            request, route_cfg, vary_headers=vary_headers
-        )
+        meta, cached_response = await cache_manager.mget([f"{base_key}:meta", base_key])
+        vary_headers = self._parse_vary_meta(meta)
+        cache_key = base_key
+        if vary_headers:
+            cache_key = self._generate_cache_key(
+                request, route_cfg, vary_headers=vary_headers
+            )
+            cached_response = await cache_manager.get(cache_key)
 
-        # Try to get cached response
-        cached_response = await cache_manager.get(cache_key)
         if cached_response:
             # Handle conditional GET using If-None-Match/ETag
             inm = request.headers.get("if-none-match")
@@ -89,116 +123,171 @@ class ResponseCachingMiddleware(BaseHTTPMiddleware):
                         resp_304.headers[hk] = hv
                 resp_304.headers["X-Cache"] = "HIT"
                 log_cache_event("get", cache_key, hit=True)
-                return resp_304
+                await resp_304(scope, receive, send)
+                return
             log_cache_event("get", cache_key, hit=True)
-            return self._create_response_from_cache(cached_response)
+            await self._create_response_from_cache(cached_response)(
+                scope, receive, send
+            )
+            return
 
         log_cache_event("get", cache_key, hit=False)
 
         # Process request (with single-flight lock to mitigate stampede)
         acquired = await cache_manager.acquire_lock(cache_key, ttl_seconds=5)
         if not acquired:
-            # Another worker is populating; wait briefly for it
-            for _ in range(20):  # ~1s total
-                await asyncio.sleep(0.05)
-                cached_response = await cache_manager.get(cache_key)
-                if cached_response:
-                    log_cache_event("get", cache_key, hit=True)
-                    return self._create_response_from_cache(cached_response)
+            # Another worker is populating; wait for its fill notification
+            cached_response = await cache_manager.wait_for(cache_key, timeout=1.0)
+            if cached_response:
+                log_cache_event("get", cache_key, hit=True)
+                await self._create_response_from_cache(cached_response)(
+                    scope, receive, send
+                )
+                return
             # Fallback: continue without caching
-        response = await call_next(request)
-
-        # Cache response if cacheable
-        if self._is_cacheable_response(request, response, route_cfg):
-            ttl = self._get_cache_ttl(response, route_cfg)
-            if ttl > 0:
-                cached_data, raw_body_bytes = await self._serialize_response(response)
-                # Determine Vary headers and persist them in meta for future keys
-                vary_list = self._extract_vary_headers(response, route_cfg)
-                await self._store_vary_headers(base_key, vary_list, ttl)
-                # Add ETag header for validation support (sha256 over raw bytes)
-                etag = self._compute_etag_bytes(raw_body_bytes)
-                if etag:
-                    response.headers["ETag"] = etag
-                    cached_data["headers"]["ETag"] = etag
-                await cache_manager.set(cache_key, cached_data, ttl)
-                log_cache_event("set", cache_key, size=len(str(cached_data)))
-        # Release lock if we acquired it
         try:
-            await cache_manager.release_lock(cache_key)
-        except Exception:
-            pass
-        else:
-            # Explicitly mark as MISS for observability
-            try:
-                response.headers["X-Cache"] = "MISS"
-            except Exception:
-                pass
-
-        return response
-
-    def _get_route_cache_config(self, request: Request) -> dict[str, Any]:
+            await self._call_and_cache(
+                scope, receive, send, request, route_cfg, base_key, cache_key
+            )
+        finally:
+            # Release lock if we acquired it
+            if acquired:
+                await cache_manager.release_lock(cache_key)
+
+    async def _call_and_cache(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+        request: Request,
+        route_cfg: CacheConfig | None,
+        base_key: str,
+        cache_key: str,
+    ) -> None:
+        """Run the downstream app, buffering and caching its response if allowed"""
+        start_message: Message = {}
+        body_chunks: list[bytes] = []
+        hasher = self._new_etag_hasher()
+        ttl = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start_message, ttl
+            if message["type"] == "http.response.start":
+                start_message = message
+                headers = MutableHeaders(scope=message)
+                cache_control = _parse_cache_control(headers.get("cache-control", ""))
+                if self._is_cacheable_response(
+                    request, message["status"], headers, cache_control, route_cfg
+                ):
+                    ttl = self._get_cache_ttl(headers, cache_control, route_cfg)
+                if ttl <= 0:
+                    # Explicitly mark as MISS for observability
+                    headers["X-Cache"] = "MISS"
+                    await send(message)
+                return
+
+            if message["type"] != "http.response.body" or ttl <= 0:
+                await send(message)
+                return
+
+            # Buffer the body, hashing each chunk as it arrives
+            chunk = message.get("body", b"")
+            body_chunks.append(chunk)
+            hasher.update(chunk)
+            if message.get("more_body", False):
+                return
+
+            body = b"".join(body_chunks)
+            headers = MutableHeaders(scope=start_message)
+            cached_data = {
+                "status_code": start_message["status"],
+                "headers": dict(headers),
+                "body": body,
+            }
+            # Add ETag header for validation support
+            etag = hasher.hexdigest()
+            headers["ETag"] = etag
+            cached_data["headers"]["ETag"] = etag
+            headers["X-Cache"] = "MISS"
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body})
+
+            # Determine Vary headers and persist them in meta for future keys
+            vary_list = self._extract_vary_headers(headers, route_cfg)
+            await cache_manager.mset(
+                {f"{base_key}:meta": {"vary": vary_list}, cache_key: cached_data},
+                ttl,
+            )
+            await cache_manager.publish(cache_key)
+            log_cache_event("set", cache_key, size=len(body))
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _get_route_cache_config(self, request: Request) -> CacheConfig | None:
         """Extract cache config from endpoint decorator if available."""
         if not self.respect_decorator:
-            return {}
-        endpoint = request.scope.get("endpoint")
-        if not endpoint:
-            return {}
-        cfg = getattr(endpoint, "_cache_config", None)
-        return cfg or {}
+            return None
+        return getattr(request.scope.get("endpoint"), "_cache_config", None)
 
     def _generate_cache_key(
         self,
         request: Request,
-        route_cfg: dict[str, Any],
+        route_cfg: CacheConfig | None,
         vary_headers: list[str],
     ) -> str:
         """Generate a cache key for the request"""
-        # Include method, path, and query parameters
-        key_prefix = route_cfg.get("key_prefix") if route_cfg else None
-        key_parts = [
-            key_prefix or "response",
-            request.method,
-            str(request.url.path),
-            str(request.url.query),
+        # Include method, path, and query parameters (hashed as bytes, so
+        # build the parts pre-encoded rather than joining and encoding a str)
+        key_parts: list[bytes] = [
+            route_cfg.key_prefix if route_cfg else b"response",
+            request.method.encode(),
+            request.scope["path"].encode(),
+            request.scope.get("query_string", b""),
         ]
 
         # Vary on user if requested by route config or when caching private
-        vary_on_user = route_cfg.get("vary_on_user") if route_cfg else False
+        vary_on_user = route_cfg.vary_on_user if route_cfg else False
         if (vary_on_user or self.cache_private) and hasattr(request.state, "user_id"):
-            key_parts.append(f"user:{request.state.user_id}")
+            key_parts.append(f"user:{request.state.user_id}".encode())
 
         # Include relevant headers from global defaults, per-route, and persisted Vary
-        relevant_headers = ["accept", "accept-language", "accept-encoding"]
-        vary_on_headers = route_cfg.get("vary_on_headers") if route_cfg else []
-        for h in vary_on_headers:  # pyright: ignore[reportOptionalIterable]
-            if h.lower() not in relevant_headers:
-                relevant_headers.append(h.lower())
-        for h in vary_headers:
-            if h.lower() not in relevant_headers:
-                relevant_headers.append(h.lower())
-
-        for header in relevant_headers:
-            if header in request.headers:
-                key_parts.append(f"{header}:{request.headers[header]}")
-
-        # Create hash of key parts
-        key_string = "|".join(key_parts)
-        cache_key = hashlib.md5(key_string.encode()).hexdigest()
+        relevant_headers = _DEFAULT_VARY_HEADERS
+        vary_on_headers = route_cfg.vary_on_headers if route_cfg else ()
+        if vary_on_headers or vary_headers:
+            relevant_headers = relevant_headers | {
+                h.lower().encode() for h in (*vary_on_headers, *vary_headers)
+            }
+
+        # ASGI header names are already lowercase bytes; sort the ones present
+        # so the key doesn't depend on header order
+        present = {
+            name: value
+            for name, value in reversed(request.headers.raw)
+            if name in relevant_headers
+        }
+        for header in sorted(present):
+            key_parts.append(header + b":" + present[header])
+
+        # Create hash of key parts (non-cryptographic use, so prefer speed)
+        cache_key = hashlib.blake2b(b"|".join(key_parts), digest_size=16).hexdigest()
 
         return f"response:{cache_key}"
 
     def _is_cacheable_response(
-        self, request: Request, response: Response, route_cfg: dict[str, Any]
+        self,
+        request: Request,
+        status_code: int,
+        headers: Headers,
+        cache_control: dict[str, str | None],
+        route_cfg: CacheConfig | None,
     ) -> bool:
         """Check if response should be cached"""
         # Check status code
-        if response.status_code not in self.cacheable_status_codes:
+        if status_code not in self.cacheable_status_codes:
             return False
 
-        # Check cache-control headers
-        cache_control = response.headers.get("cache-control", "").lower()
-        if "no-cache" in cache_control or "no-store" in cache_control:
+        # Check cache-control directives
+        if not _NO_CACHE_DIRECTIVES.isdisjoint(cache_control):
             return False
 
         # Don't cache private responses unless explicitly allowed
@@ -206,11 +295,11 @@ class ResponseCachingMiddleware(BaseHTTPMiddleware):
             return False
 
         # Don't cache responses with set-cookie headers
-        if response.headers.get("set-cookie") is not None:
+        if headers.get("set-cookie") is not None:
             return False
 
         # Avoid caching Authorization-bound requests unless we vary on user
-        vary_on_user = route_cfg.get("vary_on_user") if route_cfg else False
+        vary_on_user = route_cfg.vary_on_user if route_cfg else False
         if request.headers.get("authorization") and not (
             vary_on_user or self.cache_private
         ):
@@ -218,21 +307,23 @@ class ResponseCachingMiddleware(BaseHTTPMiddleware):
 
         return True
 
-    def _get_cache_ttl(self, response: Response, route_cfg: dict[str, Any]) -> int:
+    def _get_cache_ttl(
+        self,
+        headers: Headers,
+        cache_control: dict[str, str | None],
+        route_cfg: CacheConfig | None,
+    ) -> int:
         """Get cache TTL from response headers or use default"""
-        cache_control = response.headers.get("cache-control", "")
-
         # Look for max-age directive
-        for directive in cache_control.split(","):
-            directive = directive.strip()
-            if directive.startswith("max-age="):
-                try:
-                    return int(directive.split("=")[1])
-                except (ValueError, IndexError):
-                    pass
+        max_age = cache_control.get("max-age")
+        if max_age:
+            try:
+                return int(max_age)
+            except ValueError:
+                pass
 
         # Check expires header
-        expires = response.headers.get("expires")
+        expires = headers.get("expires")
         if expires:
             try:
                 from email.utils import parsedate_to_datetime
@@ -247,36 +338,10 @@ class ResponseCachingMiddleware(BaseHTTPMiddleware):
                 pass
 
         # Respect decorator ttl if present
-        if route_cfg and route_cfg.get("ttl") is not None:
-            try:
-                return int(route_cfg["ttl"])
-            except Exception:
-                pass
+        if route_cfg:
+            return route_cfg.ttl
         return self.default_ttl
 
-    async def _serialize_response(self, response: Response) -> tuple[dict, bytes]:
-        """Serialize response for caching and return raw bytes too"""
-        # Read response body
-        body = b""
-        body_chunks = []
-        async for chunk in response.body_iterator:  # pyright: ignore[reportAttributeAccessIssue]
-            body += chunk
-            body_chunks.append(chunk)
-
-        # Recreate the response body iterator so the original response isn't empty
-        async def recreate_body_iterator():
-            for chunk in body_chunks:
-                yield chunk
-
-        response.body_iterator = recreate_body_iterator()  # pyright: ignore[reportAttributeAccessIssue]
-
-        return {
-            "status_code": response.status_code,
-            "headers": dict(response.headers),
-            "body": body.decode("utf-8", errors="ignore"),
-            "media_type": response.media_type,
-        }, body
-
     def _create_response_from_cache(self, cached_data: dict) -> Response:
         """Create response from cached data"""
         response = Response(
@@ -304,22 +369,21 @@ class ResponseCachingMiddleware(BaseHTTPMiddleware):
 
         return response
 
-    def _compute_etag_bytes(self, raw_bytes: bytes) -> str | None:
-        try:
-            import hashlib as _hl
-
-            return _hl.sha256(raw_bytes).hexdigest()
-        except Exception:
-            return None
+    @staticmethod
+    def _new_etag_hasher():
+        if settings.ETAG_ALGO == "sha256":
+            return hashlib.sha256()
+        # ETags only need to change with the body, not resist attacks
+        return xxhash.xxh3_128()
 
     def _extract_vary_headers(
-        self, response: Response, route_cfg: dict[str, Any]
+        self, headers: Headers, route_cfg: CacheConfig | None
     ) -> list[str]:
         # Combine decorator-provided varies with response Vary header
         varies = []
-        vary_on_headers = route_cfg.get("vary_on_headers") if route_cfg else []
-        varies.extend([h.lower() for h in (vary_on_headers or [])])
-        vary_hdr = response.headers.get("Vary") or response.headers.get("vary")
+        if route_cfg:
+            varies.extend(route_cfg.vary_on_headers)
+        vary_hdr = headers.get("vary")
         if vary_hdr:
             for part in vary_hdr.split(","):
                 h = part.strip().lower()
@@ -328,27 +392,10 @@ class ResponseCachingMiddleware(BaseHTTPMiddleware):
         # Always include defaults already handled elsewhere; no need to add here
         return varies
 
-    async def _store_vary_headers(
-        self, base_key: str, vary_headers: list[str], ttl: int
-    ) -> None:
-        try:
-            meta_key = f"{base_key}:meta"
-            await cache_manager.set(meta_key, {"vary": vary_headers}, ttl)
-        except Exception:
-            pass
-
-    async def _load_vary_headers(self, base_key: str) -> list[str]:
-        try:
-            meta_key = f"{base_key}:meta"
-            meta = await cache_manager.get(meta_key)
-            if (
-                isinstance(meta, dict)
-                and "vary" in meta
-                and isinstance(meta["vary"], list)
-            ):
-                return [str(h).lower() for h in meta["vary"]]
-        except Exception:
-            pass
+    @staticmethod
+    def _parse_vary_meta(meta: object) -> list[str]:
+        if isinstance(meta, dict) and isinstance(meta.get("vary"), list):
+            return [str(h).lower() for h in meta["vary"]]
         return []
 
 
@@ -369,12 +416,12 @@ def cache_response(
     """
 
     def decorator(func):
-        func._cache_config = {
-            "ttl": ttl or settings.CACHE_TTL,
-            "key_prefix": key_prefix or func.__name__,
-            "vary_on_user": vary_on_user,
-            "vary_on_headers": vary_on_headers or [],
-        }
+        func._cache_config = CacheConfig(
+            ttl=int(ttl or settings.CACHE_TTL),
+            key_prefix=(key_prefix or func.__name__).encode(),
+            vary_on_user=vary_on_user,
+            vary_on_headers=tuple(h.lower() for h in (vary_on_headers or [])),
+        )
         return func
 
     return decorator
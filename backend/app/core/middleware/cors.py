@@ -10,88 +10,64 @@ from app.config import get_settings
 settings = get_settings()
 
 
+_LOCAL_DEV_ORIGINS = frozenset({"http://localhost:3000", "http://127.0.0.1:3000"})
+
+# Explicit list of allowed headers
+_ALLOWED_HEADERS = (
+    "Accept",
+    "Accept-Language",
+    "Content-Language",
+    "Content-Type",
+    "Authorization",
+    "X-Requested-With",
+    "X-Request-ID",
+    "X-API-Key",
+    "X-CSRF-Token",
+    "Cache-Control",
+    "Pragma",
+)
+_ALLOWED_METHODS = ("GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS")
+_EXPOSE_HEADERS = (
+    "X-Request-ID",
+    "X-RateLimit-Limit",
+    "X-RateLimit-Remaining",
+    "X-RateLimit-Window",
+    "Retry-After",
+    "X-CSRF-Token",
+)
+
+
 def setup_cors(app: FastAPI) -> None:
     """Setup CORS middleware with proper configuration"""
 
-    # Ensure list of allowed origins are plain strings
+    # Ensure allowed origins are plain strings. Starlette keeps this
+    # collection as-is for its per-request membership check, so a frozenset
+    # makes that lookup O(1).
     configured_origins = settings.BACKEND_CORS_ORIGINS
-    allowed_origins = [str(o) for o in (configured_origins or [])]
+    origins = {str(o) for o in (configured_origins or [])}
     # Always include explicit frontend host if provided
     if getattr(settings, "FRONTEND_HOST", None):
         fh = str(settings.FRONTEND_HOST)
-        if fh and fh not in allowed_origins:
-            allowed_origins.append(fh)
-
-    # If no origins configured (e.g., env var set to empty), default to local dev
-    if not allowed_origins:
-        allowed_origins = [
-            "http://localhost:3000",
-            "http://127.0.0.1:3000",
-        ]
-
-    # Add common local dev aliases if applicable
-    if (
-        "http://localhost:3000" in allowed_origins
-        and "http://127.0.0.1:3000" not in allowed_origins
-    ):
-        allowed_origins.append("http://127.0.0.1:3000")
-    if (
-        "http://127.0.0.1:3000" in allowed_origins
-        and "http://localhost:3000" not in allowed_origins
-    ):
-        allowed_origins.append("http://localhost:3000")
+        if fh:
+            origins.add(fh)
 
-    # Explicit list of allowed headers
-    allowed_headers = [
-        "Accept",
-        "Accept-Language",
-        "Content-Language",
-        "Content-Type",
-        "Authorization",
-        "X-Requested-With",
-        "X-Request-ID",
-        "X-API-Key",
-        "X-CSRF-Token",
-        "Cache-Control",
-        "Pragma",
-    ]
+    # If no origins configured (e.g., env var set to empty), default to local
+    # dev; if either local dev alias is configured, allow the other too
+    if not origins or not origins.isdisjoint(_LOCAL_DEV_ORIGINS):
+        origins |= _LOCAL_DEV_ORIGINS
+    allowed_origins = frozenset(origins)
 
-    # In local/dev, allow credentials for cross-site cookie refresh flow
-    if settings.is_development:
-        app.add_middleware(
-            CORSMiddleware,
-            allow_origins=allowed_origins,
-            allow_credentials=True,
-            allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
-            allow_headers=allowed_headers,
-            expose_headers=[
-                "X-Request-ID",
-                "X-RateLimit-Limit",
-                "X-RateLimit-Remaining",
-                "X-RateLimit-Window",
-                "Retry-After",
-                "X-CSRF-Token",
-            ],
-            max_age=3600,  # 1 hour
-        )
-    else:
-        app.add_middleware(
-            CORSMiddleware,
-            allow_origins=allowed_origins,
-            allow_credentials=settings.USE_CREDENTIALS,
-            # Explicitly list common methods including OPTIONS for preflight
-            allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
-            allow_headers=allowed_headers,  # Explicit headers instead of "*"
-            expose_headers=[
-                "X-Request-ID",
-                "X-RateLimit-Limit",
-                "X-RateLimit-Remaining",
-                "X-RateLimit-Window",
-                "Retry-After",
-                "X-CSRF-Token",
-            ],
-            max_age=3600,  # 1 hour instead of 24 hours
-        )
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=allowed_origins,
+        # In local/dev, allow credentials for cross-site cookie refresh flow
+        allow_credentials=settings.is_development or settings.USE_CREDENTIALS,
+        # Explicitly list common methods including OPTIONS for preflight
+        allow_methods=_ALLOWED_METHODS,
+        allow_headers=_ALLOWED_HEADERS,  # Explicit headers instead of "*"
+        expose_headers=_EXPOSE_HEADERS,
+        max_age=3600,  # 1 hour
+    )
 
 
 def get_cors_config():
@@ -99,27 +75,8 @@ def get_cors_config():
     return {
         "allow_origins": settings.BACKEND_CORS_ORIGINS,
         "allow_credentials": settings.USE_CREDENTIALS,
-        "allow_methods": ["DELETE", "GET", "POST", "PUT", "PATCH", "OPTIONS"],
-        "allow_headers": [
-            "Accept",
-            "Accept-Language",
-            "Content-Language",
-            "Content-Type",
-            "Authorization",
-            "X-Requested-With",
-            "X-Request-ID",
-            "X-API-Key",
-            "X-CSRF-Token",
-            "Cache-Control",
-            "Pragma",
-        ],
-        "expose_headers": [
-            "X-Request-ID",
-            "X-RateLimit-Limit",
-            "X-RateLimit-Remaining",
-            "X-RateLimit-Window",
-            "Retry-After",
-            "X-CSRF-Token",
-        ],
+        "allow_methods": _ALLOWED_METHODS,
+        "allow_headers": _ALLOWED_HEADERS,
+        "expose_headers": _EXPOSE_HEADERS,
         "max_age": 86400,
     }
@@ -2,16 +2,20 @@
 Error handling middleware for FastAPI application with Loguru integration
 """
 
+import asyncio
+import secrets
 import traceback
-import uuid
 from collections.abc import Callable
+from functools import lru_cache
+from typing import Any
 
-from fastapi import HTTPException, Request, status
+import orjson
+from fastapi import FastAPI, HTTPException, Request, Response, status
 from fastapi.encoders import jsonable_encoder
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from pydantic import ValidationError
 from sqlalchemy.exc import DatabaseError, IntegrityError, SQLAlchemyError
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.config import get_settings
 from app.loggs import get_logger
@@ -19,189 +23,260 @@ from app.loggs import get_logger
 settings = get_settings()
 logger = get_logger(__name__)
 
+# Constraint keyword found in an IntegrityError -> client-facing message
+_INTEGRITY_MESSAGES = (
+    ("unique", "A record with this information already exists"),
+    ("foreign key", "Referenced record does not exist"),
+    ("not null", "Required field is missing"),
+)
 
+# Error bodies that never vary, serialized once
+_PERMISSION_ERROR_BODY = orjson.dumps(
+    {"error": {"type": "permission_error", "message": "Insufficient permissions"}}
+)
 
-class ErrorHandlingMiddleware(BaseHTTPMiddleware):
+
+# Strong references to in-flight traceback log tasks so they aren't GC'd
+_traceback_tasks: set[asyncio.Task] = set()
+
+
+def _log_traceback(label: str, e: Exception) -> None:
+    """Log e's traceback, formatting it in a worker thread off the event loop"""
+
+    async def format_and_log() -> None:
+        lines = await asyncio.to_thread(traceback.format_exception, e)
+        logger.error("{}: {}", label, "".join(lines))
+
+    task = asyncio.get_running_loop().create_task(format_and_log())
+    _traceback_tasks.add(task)
+    task.add_done_callback(_traceback_tasks.discard)
+
+
+class ErrorHandlingMiddleware:
     """Middleware for centralized error handling with comprehensive logging"""
 
-    async def dispatch(self, request: Request, call_next: Callable) -> JSONResponse:
-        try:
-            response = await call_next(request)
-            return response
-
-        except HTTPException as e:
-            # FastAPI HTTP exceptions - pass through with logging
-            logger.info(
-                "HTTP exception",
-                path=request.url.path,
-                method=request.method,
-                status_code=e.status_code,
-                detail=e.detail
-            )
-
-            return JSONResponse(
-                status_code=e.status_code,
-                content=jsonable_encoder(
-                    {
-                        "error": {
-                            "type": "http_exception",
-                            "message": e.detail,
-                            "status_code": e.status_code,
-                        }
-                    }
-                ),
-                headers=e.headers,
-            )
-
-        except ValidationError as e:
-            # Pydantic validation errors
-            logger.warning(
-                "Validation error",
-                path=request.url.path,
-                method=request.method,
-                errors=e.errors()
-            )
-
-            return JSONResponse(
-                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                content=jsonable_encoder(
-                    {
-                        "error": {
-                            "type": "validation_error",
-                            "message": "Validation failed",
-                            "details": e.errors(),
-                        }
-                    }
-                ),
-            )
-
-        except IntegrityError as e:
-            # Database integrity constraint violations
-            error_id = str(uuid.uuid4())
-            logger.error(
-                f"Database integrity error [{error_id}]",
-                path=request.url.path,
-                method=request.method,
-                error=str(e),
-                error_type="IntegrityError"
-            )
-
-            # Try to extract meaningful message
-            error_msg = "Database constraint violation"
-            if "unique" in str(e).lower():
-                error_msg = "A record with this information already exists"
-            elif "foreign key" in str(e).lower():
-                error_msg = "Referenced record does not exist"
-            elif "not null" in str(e).lower():
-                error_msg = "Required field is missing"
-
-            return JSONResponse(
-                status_code=status.HTTP_409_CONFLICT,
-                content=jsonable_encoder(
-                    {
-                        "error": {
-                            "type": "integrity_error",
-                            "message": error_msg,
-                            "error_id": error_id,
-                            "details": str(e) if settings.is_development else None,
-                        }
-                    }
-                ),
-            )
-
-        except (SQLAlchemyError, DatabaseError) as e:
-            # Database errors
-            error_id = str(uuid.uuid4())
-            logger.error(
-                f"Database error [{error_id}]",
-                path=request.url.path,
-                method=request.method,
-                error=str(e),
-                error_type=type(e).__name__
-            )
-
-            if settings.is_development:
-                logger.error(f"Database error traceback: {traceback.format_exc()}")
-
-            return JSONResponse(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                content=jsonable_encoder(
-                    {
-                        "error": {
-                            "type": "database_error",
-                            "message": "Database operation failed",
-                            "error_id": error_id,
-                            "details": str(e) if settings.is_development else None,
-                        }
-                    }
-                ),
-            )
-
-        except ValueError as e:
-            # Value errors (often from business logic)
-            logger.warning(
-                "Value error",
-                path=request.url.path,
-                method=request.method,
-                error=str(e)
-            )
-
-            return JSONResponse(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                content=jsonable_encoder(
-                    {"error": {"type": "value_error", "message": str(e)}}
-                ),
-            )
-
-        except PermissionError as e:
-            # Permission errors
-            logger.warning(
-                "Permission error",
-                path=request.url.path,
-                method=request.method,
-                error=str(e)
-            )
-
-            return JSONResponse(
-                status_code=status.HTTP_403_FORBIDDEN,
-                content=jsonable_encoder(
-                    {
-                        "error": {
-                            "type": "permission_error",
-                            "message": "Insufficient permissions",
-                        }
-                    }
-                ),
-            )
+    # Pure ASGI: the happy path is a plain await with no per-request task or
+    # memory stream, and a Request is only built once something has raised
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
 
+        try:
+            await self.app(scope, receive, send_wrapper)
         except Exception as e:
-            # Unexpected errors
-            error_id = str(uuid.uuid4())
-            logger.error(
-                f"Unexpected error [{error_id}]",
-                path=request.url.path,
-                method=request.method,
-                error=str(e),
-                error_type=type(e).__name__
-            )
-
-            if settings.is_development:
-                logger.error(f"Traceback: {traceback.format_exc()}")
-
-            return JSONResponse(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                content=jsonable_encoder(
-                    {
-                        "error": {
-                            "type": "internal_error",
-                            "message": "An unexpected error occurred",
-                            "error_id": error_id,
-                            "details": str(e) if settings.is_development else None,
-                        }
-                    }
-                ),
-            )
+            if response_started:
+                # Too late to replace the response; let the server handle it
+                raise
+            response = self._error_response(Request(scope), e)
+            await response(scope, receive, send)
+
+    def _error_response(self, request: Request, e: Exception) -> Response:
+        """Map an exception to a JSON error response (called in except block)"""
+        return _handler_for(type(e))(request, e)
+
+
+def _handle_http_exception(request: Request, e: HTTPException) -> Response:
+    # FastAPI HTTP exceptions - pass through; 4xx are routine client errors
+    # already in the access log, so only server errors get a log record
+    if e.status_code >= 500:
+        logger.info(
+            "HTTP exception",
+            path=request.url.path,
+            method=request.method,
+            status_code=e.status_code,
+            detail=e.detail
+        )
+
+    return ORJSONResponse(
+        status_code=e.status_code,
+        content={
+            "error": {
+                "type": "http_exception",
+                "message": e.detail,
+                "status_code": e.status_code,
+            }
+        },
+        headers=e.headers,
+    )
+
+
+def _handle_validation_error(request: Request, e: ValidationError) -> Response:
+    # Pydantic validation errors, serialized by pydantic-core itself (it
+    # handles ctx objects) and embedded as-is. The doc URL and the raw input,
+    # which may be any object or a secret, are left out.
+    errors = e.json(include_url=False, include_input=False)
+    logger.warning(
+        "Validation error",
+        path=request.url.path,
+        method=request.method,
+        errors=errors
+    )
+
+    return ORJSONResponse(
+        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        content={
+            "error": {
+                "type": "validation_error",
+                "message": "Validation failed",
+                "details": orjson.Fragment(errors),
+            }
+        },
+    )
+
+
+def _handle_integrity_error(request: Request, e: IntegrityError) -> Response:
+    # Database integrity constraint violations
+    error_id = secrets.token_hex(8)
+    error_text = str(e)
+    logger.error(
+        "Database integrity error [{}]",
+        error_id,
+        path=request.url.path,
+        method=request.method,
+        error=error_text,
+        error_type="IntegrityError"
+    )
+
+    # Try to extract meaningful message
+    error_lower = error_text.lower()
+    error_msg = next(
+        (msg for keyword, msg in _INTEGRITY_MESSAGES if keyword in error_lower),
+        "Database constraint violation",
+    )
+
+    return ORJSONResponse(
+        status_code=status.HTTP_409_CONFLICT,
+        content={
+            "error": {
+                "type": "integrity_error",
+                "message": error_msg,
+                "error_id": error_id,
+                "details": error_text if settings.is_development else None,
+            }
+        },
+    )
+
+
+def _handle_database_error(request: Request, e: SQLAlchemyError) -> Response:
+    # Database errors
+    error_id = secrets.token_hex(8)
+    logger.error(
+        "Database error [{}]",
+        error_id,
+        path=request.url.path,
+        method=request.method,
+        error=str(e),
+        error_type=type(e).__name__
+    )
+
+    if settings.is_development:
+        _log_traceback("Database error traceback", e)
+
+    return ORJSONResponse(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        content={
+            "error": {
+                "type": "database_error",
+                "message": "Database operation failed",
+                "error_id": error_id,
+                "details": str(e) if settings.is_development else None,
+            }
+        },
+    )
+
+
+def _handle_value_error(request: Request, e: ValueError) -> Response:
+    # Value errors (often from business logic)
+    logger.warning(
+        "Value error",
+        path=request.url.path,
+        method=request.method,
+        error=str(e)
+    )
+
+    return ORJSONResponse(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        content={"error": {"type": "value_error", "message": str(e)}},
+    )
+
+
+def _handle_permission_error(request: Request, e: PermissionError) -> Response:
+    # Permission errors
+    logger.warning(
+        "Permission error",
+        path=request.url.path,
+        method=request.method,
+        error=str(e)
+    )
+
+    return Response(
+        content=_PERMISSION_ERROR_BODY,
+        status_code=status.HTTP_403_FORBIDDEN,
+        media_type="application/json",
+    )
+
+
+def _handle_unexpected_error(request: Request, e: Exception) -> Response:
+    # Unexpected errors
+    error_id = secrets.token_hex(8)
+    logger.error(
+        "Unexpected error [{}]",
+        error_id,
+        path=request.url.path,
+        method=request.method,
+        error=str(e),
+        error_type=type(e).__name__
+    )
+
+    if settings.is_development:
+        _log_traceback("Traceback", e)
+
+    return ORJSONResponse(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        content={
+            "error": {
+                "type": "internal_error",
+                "message": "An unexpected error occurred",
+                "error_id": error_id,
+                "details": str(e) if settings.is_development else None,
+            }
+        },
+    )
+
 
+# Exception type -> handler, resolved along the exception's MRO so the most
+# specific entry wins (e.g. IntegrityError over DatabaseError, pydantic's
+# ValidationError over ValueError)
+_HANDLERS: dict[type[Exception], Callable[[Request, Any], Response]] = {
+    HTTPException: _handle_http_exception,
+    ValidationError: _handle_validation_error,
+    IntegrityError: _handle_integrity_error,
+    DatabaseError: _handle_database_error,
+    SQLAlchemyError: _handle_database_error,
+    ValueError: _handle_value_error,
+    PermissionError: _handle_permission_error,
+}
+
+
+@lru_cache(maxsize=128)
+def _handler_for(exc_type: type[Exception]) -> Callable[[Request, Any], Response]:
+    return next(
+        (_HANDLERS[cls] for cls in exc_type.__mro__ if cls in _HANDLERS),
+        _handle_unexpected_error,
+    )
 
 
 # Helper functions for creating standardized error responses
@@ -211,7 +286,7 @@ def create_error_response(
     error_type: str = "error",
     details: dict | list | str | None = None,
     error_id: str | None = None,
-) -> JSONResponse:
+) -> ORJSONResponse:
     """Helper function to create standardized error responses"""
     content = {"error": {"type": error_type, "message": message}}
 
@@ -221,32 +296,36 @@ def create_error_response(
     if error_id:
         content["error"]["error_id"] = error_id
 
-    return JSONResponse(status_code=status_code, content=jsonable_encoder(content))
+    return ORJSONResponse(status_code=status_code, content=content)
 
 
-def create_validation_error_response(errors: list, error_id: str | None = None) -> JSONResponse:
+def create_validation_error_response(errors: list, error_id: str | None = None) -> ORJSONResponse:
     """Helper function to create validation error responses"""
     content = {
         "error": {
             "type": "validation_error",
             "message": "Validation failed",
-            "details": errors,
+            # Raw pydantic errors may hold non-JSON input/ctx values
+            "details": jsonable_encoder(errors),
         }
     }
 
     if error_id:
         content["error"]["error_id"] = error_id
 
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-        content=jsonable_encoder(content),
+        content=content,
     )
 
 
-# Custom exception classes
+# Custom exception classes. All attributes live in __slots__, so the
+# instance __dict__ BaseException would otherwise create is never allocated.
 class BusinessLogicError(Exception):
     """Custom exception for business logic errors"""
 
+    __slots__ = ("message", "status_code", "details")
+
     def __init__(self, message: str, status_code: int = status.HTTP_400_BAD_REQUEST, details: dict | None = None):
         self.message = message
         self.status_code = status_code
@@ -257,6 +336,8 @@ class BusinessLogicError(Exception):
 class AuthenticationError(Exception):
     """Custom exception for authentication errors"""
 
+    __slots__ = ("message", "details")
+
     def __init__(self, message: str = "Authentication failed", details: dict | None = None):
         self.message = message
         self.details = details
@@ -266,6 +347,8 @@ class AuthenticationError(Exception):
 class AuthorizationError(Exception):
     """Custom exception for authorization errors"""
 
+    __slots__ = ("message", "details")
+
     def __init__(self, message: str = "Insufficient permissions", details: dict | None = None):
         self.message = message
         self.details = details
@@ -275,6 +358,8 @@ class AuthorizationError(Exception):
 class ResourceNotFoundError(Exception):
     """Custom exception for resource not found errors"""
 
+    __slots__ = ("message", "resource", "identifier", "details")
+
     def __init__(self, resource: str, identifier: str = "", details: dict | None = None):
         if identifier:
             message = f"{resource} with identifier '{identifier}' not found"
@@ -290,6 +375,8 @@ class ResourceNotFoundError(Exception):
 class ConflictError(Exception):
     """Custom exception for resource conflict errors"""
 
+    __slots__ = ("message", "details")
+
     def __init__(self, message: str, details: dict | None = None):
         self.message = message
         self.details = details
@@ -299,172 +386,101 @@ class ConflictError(Exception):
 class RateLimitError(Exception):
     """Custom exception for rate limit errors"""
 
+    __slots__ = ("message", "retry_after")
+
     def __init__(self, message: str = "Rate limit exceeded", retry_after: int | None = None):
         self.message = message
         self.retry_after = retry_after
         super().__init__(message)
 
 
-# Exception handlers for custom exceptions
-async def business_logic_error_handler(request: Request, exc: BusinessLogicError):
-    """Handler for business logic errors"""
-    error_id = str(uuid.uuid4())
-    logger.warning(
-        f"Business logic error [{error_id}]",
-        path=request.url.path,
-        method=request.method,
-        message=exc.message
-    )
-
-    content = {
-        "error": {
-            "type": "business_logic_error",
-            "message": exc.message,
-            "error_id": error_id
-        }
-    }
-
-    if exc.details:
-        content["error"]["details"] = exc.details
-
-    return JSONResponse(
-        status_code=exc.status_code,
-        content=content,
-    )
-
-
-async def authentication_error_handler(request: Request, exc: AuthenticationError):
-    """Handler for authentication errors"""
-    error_id = str(uuid.uuid4())
-    logger.warning(
-        f"Authentication error [{error_id}]",
-        path=request.url.path,
-        method=request.method,
-        message=exc.message
-    )
-
-    content = {
-        "error": {
-            "type": "authentication_error",
-            "message": exc.message,
-            "error_id": error_id
-        }
-    }
-
-    if exc.details:
-        content["error"]["details"] = exc.details
-
-    return JSONResponse(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        content=content,
-    )
-
-
-async def authorization_error_handler(request: Request, exc: AuthorizationError):
-    """Handler for authorization errors"""
-    error_id = str(uuid.uuid4())
-    logger.warning(
-        f"Authorization error [{error_id}]",
-        path=request.url.path,
-        method=request.method,
-        message=exc.message
-    )
-
-    content = {
-        "error": {
-            "type": "authorization_error",
-            "message": exc.message,
-            "error_id": error_id
-        }
-    }
-
-    if exc.details:
-        content["error"]["details"] = exc.details
-
-    return JSONResponse(
-        status_code=status.HTTP_403_FORBIDDEN,
-        content=content,
+# Custom exception -> (status code, or None to use exc.status_code; error
+# type; log label; log level)
+_CUSTOM_ERRORS: dict[type[Exception], tuple[int | None, str, str, str]] = {
+    BusinessLogicError: (None, "business_logic_error", "Business logic error", "WARNING"),
+    AuthenticationError: (
+        status.HTTP_401_UNAUTHORIZED,
+        "authentication_error",
+        "Authentication error",
+        "WARNING",
+    ),
+    AuthorizationError: (
+        status.HTTP_403_FORBIDDEN,
+        "authorization_error",
+        "Authorization error",
+        "WARNING",
+    ),
+    ResourceNotFoundError: (
+        status.HTTP_404_NOT_FOUND,
+        "resource_not_found",
+        "Resource not found",
+        "INFO",
+    ),
+    ConflictError: (
+        status.HTTP_409_CONFLICT,
+        "conflict_error",
+        "Conflict error",
+        "WARNING",
+    ),
+    RateLimitError: (
+        status.HTTP_429_TOO_MANY_REQUESTS,
+        "rate_limit_error",
+        "Rate limit error",
+        "WARNING",
+    ),
+}
+
+
+# Exception handler for all custom exceptions
+async def custom_exception_handler(request: Request, exc: Exception) -> ORJSONResponse:
+    """Handler for the custom exceptions above, driven by _CUSTOM_ERRORS"""
+    status_code, error_type, label, level = next(
+        _CUSTOM_ERRORS[cls] for cls in type(exc).__mro__ if cls in _CUSTOM_ERRORS
     )
-
-
-async def resource_not_found_error_handler(request: Request, exc: ResourceNotFoundError):
-    """Handler for resource not found errors"""
-    error_id = str(uuid.uuid4())
-    logger.info(
-        f"Resource not found [{error_id}]",
+    error_id = secrets.token_hex(8)
+
+    if isinstance(exc, ResourceNotFoundError):
+        log_fields = {"resource": exc.resource, "identifier": exc.identifier}
+    else:
+        log_fields = {"message": exc.message}
+    logger.log(
+        level,
+        "{} [{}]",
+        label,
+        error_id,
         path=request.url.path,
         method=request.method,
-        resource=exc.resource,
-        identifier=exc.identifier
+        **log_fields
     )
 
-    content = {
-        "error": {
-            "type": "resource_not_found",
+    headers = None
+    if isinstance(exc, RateLimitError):
+        error = {
+            "type": error_type,
             "message": exc.message,
-            "error_id": error_id
+            "error_id": error_id,
+            "retry_after": exc.retry_after,
         }
-    }
-
-    if exc.details:
-        content["error"]["details"] = exc.details
-
-    return JSONResponse(
-        status_code=status.HTTP_404_NOT_FOUND,
-        content=content,
-    )
-
-
-async def conflict_error_handler(request: Request, exc: ConflictError):
-    """Handler for conflict errors"""
-    error_id = str(uuid.uuid4())
-    logger.warning(
-        f"Conflict error [{error_id}]",
-        path=request.url.path,
-        method=request.method,
-        message=exc.message
-    )
-
-    content = {
-        "error": {
-            "type": "conflict_error",
+        if exc.retry_after:
+            headers = {"Retry-After": str(exc.retry_after)}
+    elif exc.details:
+        error = {
+            "type": error_type,
             "message": exc.message,
-            "error_id": error_id
+            "error_id": error_id,
+            "details": exc.details,
         }
-    }
-
-    if exc.details:
-        content["error"]["details"] = exc.details
-
-    return JSONResponse(
-        status_code=status.HTTP_409_CONFLICT,
-        content=content,
-    )
-
+    else:
+        error = {"type": error_type, "message": exc.message, "error_id": error_id}
 
-async def rate_limit_error_handler(request: Request, exc: RateLimitError):
-    """Handler for rate limit errors"""
-    error_id = str(uuid.uuid4())
-    logger.warning(
-        f"Rate limit error [{error_id}]",
-        path=request.url.path,
-        method=request.method,
-        message=exc.message
+    return ORJSONResponse(
+        status_code=status_code or exc.status_code,
+        content={"error": error},
+        headers=headers,
     )
 
-    headers = {}
-    if exc.retry_after:
-        headers["Retry-After"] = str(exc.retry_after)
 
-    return JSONResponse(
-        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-        content={
-            "error": {
-                "type": "rate_limit_error",
-                "message": exc.message,
-                "error_id": error_id,
-                "retry_after": exc.retry_after
-            }
-        },
-        headers=headers,
-    )
+def register_exception_handlers(app: FastAPI) -> None:
+    """Register custom_exception_handler for every custom exception type"""
+    for exc_type in _CUSTOM_ERRORS:
+        app.add_exception_handler(exc_type, custom_exception_handler)
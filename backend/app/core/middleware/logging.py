@@ -5,60 +5,59 @@ Request logging middleware with Loguru integration
 import time
 from collections.abc import Callable
 
-from fastapi import Request, Response
+from fastapi import FastAPI, Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware
 
 from app.config import get_settings
-from app.loggs import get_logger, log_request, structured_logger
+from app.core.middleware.security import get_client_ip, get_content_length
+from app.loggs import enqueue_request_log, get_logger, structured_logger
 
 settings = get_settings()
 logger = get_logger(__name__)
 
+# Health check and docs endpoints are never logged
+_SKIP_LOG_PATHS = frozenset({"/health", "/metrics", "/docs", "/redoc", "/openapi.json"})
+
+
+def _user_id(user) -> str | None:
+    """String form of the user's id, or None if there is no user or id"""
+    user_id = getattr(user, "id", None) if user else None
+    return None if user_id is None else str(user_id)
+
 
 class RequestLoggingMiddleware(BaseHTTPMiddleware):
-    """Middleware for logging HTTP requests with structured data using Loguru"""
+    """Middleware for logging HTTP requests with structured data using Loguru
+
+    Only registered when REQUEST_LOGGING is set (see setup_request_logging).
+    """
 
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
         # Skip logging for health check and metrics endpoints
-        if request.url.path in [
-            "/health",
-            "/metrics",
-            "/docs",
-            "/redoc",
-            "/openapi.json",
-        ]:
-            return await call_next(request)
-
-        if not settings.REQUEST_LOGGING:
+        path = request.scope["path"]
+        if path in _SKIP_LOG_PATHS:
             return await call_next(request)
 
         # Start timing
         start_time = time.time()
 
         # Bind request context to logger
-        request_id = structured_logger.bind_request(request)
+        request_id, ctx_token = structured_logger.bind_request(request)
 
         # Get request details
         method = request.method
-        url = str(request.url)
-        path = request.url.path
+        # Raw query bytes; decoded by log_request off the hot path
+        query = request.scope["query_string"]
         user_agent = request.headers.get("user-agent", "unknown")
 
         # Get client IP (considering proxies)
-        ip_address = self._get_client_ip(request)
+        ip_address = get_client_ip(request)
 
         # Get request size
-        request_size = request.headers.get("content-length")
-        if request_size:
-            try:
-                request_size = int(request_size)
-            except (ValueError, TypeError):
-                request_size = None
+        request_size = get_content_length(request.scope)
 
         # Get user ID if available
-        user_id = None
-        if hasattr(request.state, "user") and request.state.user:
-            user_id = str(getattr(request.state.user, "id", None))
+        # (stringified only if a slow or failed request is actually logged)
+        user = getattr(request.state, "user", None)
 
         try:
             # Process request
@@ -76,9 +75,10 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
                     response_size = None
 
             # Log request with structured data
-            log_request(
+            enqueue_request_log(
                 method=method,
-                url=url,
+                path=path,
+                query=query,
                 status_code=response.status_code,
                 duration=duration,
                 # pyright: ignore[reportArgumentType]
@@ -86,6 +86,8 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
                 response_size=response_size,
                 user_agent=user_agent,
                 ip_address=ip_address,
+                request_id=request_id,
+                user_id=getattr(user, "id", None) if user else None,
             )
 
             # Add request ID to response headers for tracing
@@ -93,14 +95,13 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
 
             # Log additional context for slow requests
             if duration > 1.0:  # Log slow requests (> 1 second)
-                logger.warning(
-                    "Slow request detected",
+                logger.bind(
                     path=path,
                     method=method,
                     duration_ms=round(duration * 1000, 2),
                     status_code=response.status_code,
-                    user_id=user_id,
-                )
+                    user_id=_user_id(user),
+                ).warning("Slow request detected")
 
             return response
 
@@ -109,55 +110,39 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
             duration = time.time() - start_time
 
             # Log failed request with error details
-            logger.error(
-                "Request failed with exception",
+            logger.bind(
                 path=path,
                 method=method,
                 duration_ms=round(duration * 1000, 2),
                 error=str(e),
                 error_type=type(e).__name__,
                 ip_address=ip_address,
-                user_id=user_id,
-            )
+                user_id=_user_id(user),
+            ).error("Request failed with exception")
 
-            # Also log using the standard log_request function
-            log_request(
+            # Also queue the standard request log
+            enqueue_request_log(
                 method=method,
-                url=url,
+                path=path,
+                query=query,
                 status_code=500,
                 duration=duration,
                 # pyright: ignore[reportArgumentType]
                 request_size=request_size,
                 user_agent=user_agent,
                 ip_address=ip_address,
+                request_id=request_id,
+                user_id=getattr(user, "id", None) if user else None,
             )
 
             raise
 
         finally:
             # Clear request context
-            structured_logger.clear_context()
-
-    def _get_client_ip(self, request: Request) -> str:
-        """Get client IP address considering proxy headers"""
-        # Check for forwarded headers (in order of preference)
-        forwarded_headers = [
-            "x-forwarded-for",
-            "x-real-ip",
-            "cf-connecting-ip",  # Cloudflare
-            "true-client-ip",  # Cloudflare Enterprise
-            "x-client-ip",
-        ]
-
-        for header in forwarded_headers:
-            if header in request.headers:
-                # X-Forwarded-For can contain multiple IPs, take the first one (client IP)
-                ip = request.headers[header].split(",")[0].strip()
-                if ip and ip != "unknown":
-                    return ip
-
-        # Fall back to direct client IP
-        if hasattr(request, "client") and request.client:
-            return request.client.host
-
-        return "unknown"
+            structured_logger.clear_context(ctx_token)
+
+
+def setup_request_logging(app: FastAPI) -> None:
+    """Register RequestLoggingMiddleware if REQUEST_LOGGING is enabled"""
+    if settings.REQUEST_LOGGING:
+        app.add_middleware(RequestLoggingMiddleware)
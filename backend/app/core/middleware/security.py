@@ -5,107 +5,183 @@ Security middleware for FastAPI application
 import time
 from collections.abc import Callable
 
-from fastapi import HTTPException, Request, Response, status
+from fastapi import FastAPI, HTTPException, Request, Response, status
+from starlette.datastructures import Headers
 from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import Scope
 
 from app.config import get_settings
 from app.loggs import log_security_event
 
 settings = get_settings()
 
+# Forwarded headers checked for the client IP, in order of preference
+_FORWARDED_HEADERS = (
+    "x-forwarded-for",
+    "x-real-ip",
+    "cf-connecting-ip",  # Cloudflare
+    "true-client-ip",  # Cloudflare Enterprise
+    "x-client-ip",
+)
+
+# Proxy headers stripped from requests that do not come from a trusted proxy
+_UNTRUSTED_PROXY_HEADERS = frozenset(
+    {b"x-forwarded-for", b"x-forwarded-proto", b"x-forwarded-host", b"x-real-ip"}
+)
+
+
+def get_direct_client_ip(request: Request) -> str:
+    """Get the socket peer's IP, ignoring client-supplied proxy headers
+
+    Security events log this value, since forwarded headers can be spoofed
+    unless ProxyHeadersMiddleware is stripping them.
+    """
+    if request.client:
+        return request.client.host
+    return "unknown"
+
+
+def get_client_ip(request: Request) -> str:
+    """Get client IP address considering proxy headers
+
+    The result is memoized on request.state, which is shared by every
+    middleware handling the same request.
+    """
+    cached = getattr(request.state, "_client_ip", None)
+    if cached is not None:
+        return cached
+
+    ip = None
+    headers = request.headers
+    for header in _FORWARDED_HEADERS:
+        value = headers.get(header)
+        if value:
+            # X-Forwarded-For can contain multiple IPs, take the first one (client IP)
+            value = value.split(",")[0].strip()
+            if value and value != "unknown":
+                ip = value
+                break
+
+    if ip is None:
+        # Fall back to direct client IP
+        ip = request.client.host if request.client else "unknown"
+
+    request.state._client_ip = ip
+    return ip
+
+
+def get_content_length(scope: Scope) -> int | None:
+    """Read Content-Length straight from the raw ASGI headers
+
+    Returns None when the header is missing or not a plain non-negative integer.
+    """
+    for name, value in scope["headers"]:
+        if name == b"content-length":
+            return int(value) if value.isdigit() else None
+    return None
+
+
+# Security headers, built once per scheme/environment combination
+_BASE_SECURITY_HEADERS = {
+    "X-Content-Type-Options": "nosniff",
+    "X-Frame-Options": "DENY",
+    "X-XSS-Protection": "1; mode=block",
+    "Referrer-Policy": "strict-origin-when-cross-origin",
+    "Permissions-Policy": (
+        "geolocation=(), microphone=(), camera=(), "
+        "payment=(), usb=(), magnetometer=(), gyroscope=(), "
+        "accelerometer=(), ambient-light-sensor=()"
+    ),
+}
+
+# Production: Strict CSP without unsafe-inline
+_STRICT_CSP = (
+    "default-src 'self'; "
+    "script-src 'self' https://cdn.jsdelivr.net; "
+    "style-src 'self' https://cdn.jsdelivr.net; "
+    "img-src 'self' data: https:; "
+    "font-src 'self' https://cdn.jsdelivr.net; "
+    "connect-src 'self'; "
+    "frame-ancestors 'none'; "
+    "base-uri 'self'; "
+    "form-action 'self';"
+)
+
+# Development: Allow unsafe-inline for Swagger UI
+_DEV_CSP = (
+    "default-src 'self'; "
+    "script-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net; "
+    "style-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net; "
+    "img-src 'self' data: https:; "
+    "font-src 'self' https://cdn.jsdelivr.net; "
+    "connect-src 'self'; "
+    "frame-ancestors 'none';"
+)
+
+_HEADERS_PROD_HTTPS = {
+    **_BASE_SECURITY_HEADERS,
+    "Strict-Transport-Security": "max-age=31536000; includeSubDomains; preload",
+    "Content-Security-Policy": _STRICT_CSP,
+}
+_HEADERS_PROD_HTTP = {**_BASE_SECURITY_HEADERS, "Content-Security-Policy": _STRICT_CSP}
+_HEADERS_DEV = {**_BASE_SECURITY_HEADERS, "Content-Security-Policy": _DEV_CSP}
+
 
 class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    """Middleware to add security headers to responses"""
+    """Middleware to add security headers to responses
+
+    Only registered when ENABLE_SECURITY_HEADERS is set (see setup_security_middleware).
+    """
 
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
         response = await call_next(request)
 
-        if settings.ENABLE_SECURITY_HEADERS:
-            # Add security headers
-            response.headers["X-Content-Type-Options"] = "nosniff"
-            response.headers["X-Frame-Options"] = "DENY"
-            response.headers["X-XSS-Protection"] = "1; mode=block"
-            response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-            response.headers["Permissions-Policy"] = (
-                "geolocation=(), microphone=(), camera=(), "
-                "payment=(), usb=(), magnetometer=(), gyroscope=(), "
-                "accelerometer=(), ambient-light-sensor=()"
-            )
-
-            # Add HSTS header for HTTPS
-            if request.url.scheme == "https":
-                response.headers["Strict-Transport-Security"] = (
-                    "max-age=31536000; includeSubDomains; preload"
-                )
-
-            # Content Security Policy - Strict for production
-            if request.url.scheme == "https" or not settings.is_development:
-                # Production: Strict CSP without unsafe-inline
-                response.headers["Content-Security-Policy"] = (
-                    "default-src 'self'; "
-                    "script-src 'self' https://cdn.jsdelivr.net; "
-                    "style-src 'self' https://cdn.jsdelivr.net; "
-                    "img-src 'self' data: https:; "
-                    "font-src 'self' https://cdn.jsdelivr.net; "
-                    "connect-src 'self'; "
-                    "frame-ancestors 'none'; "
-                    "base-uri 'self'; "
-                    "form-action 'self';"
-                )
-            else:
-                # Development: Allow unsafe-inline for Swagger UI
-                response.headers["Content-Security-Policy"] = (
-                    "default-src 'self'; "
-                    "script-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net; "
-                    "style-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net; "
-                    "img-src 'self' data: https:; "
-                    "font-src 'self' https://cdn.jsdelivr.net; "
-                    "connect-src 'self'; "
-                    "frame-ancestors 'none';"
-                )
+        # HTTPS always gets HSTS and the strict CSP
+        if request.url.scheme == "https":
+            headers = _HEADERS_PROD_HTTPS
+        elif settings.is_development:
+            headers = _HEADERS_DEV
+        else:
+            headers = _HEADERS_PROD_HTTP
+        response.headers.update(headers)
 
         return response
 
 
 class TrustedHostMiddleware(BaseHTTPMiddleware):
-    """Middleware to validate trusted hosts"""
+    """Middleware to validate trusted hosts
 
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        if settings.ALLOWED_HOSTS and "*" not in settings.ALLOWED_HOSTS:
-            host = request.headers.get("host", "").split(":")[0]
+    Only registered when ALLOWED_HOSTS is restrictive (see setup_security_middleware).
+    """
 
-            if host not in settings.ALLOWED_HOSTS:
-                log_security_event(
-                    event_type="untrusted_host",
-                    severity="medium",
-                    details={
-                        "host": host,
-                        "allowed_hosts": settings.ALLOWED_HOSTS,
-                    },
-                    ip_address=self._get_client_ip(request),
-                )
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Invalid host header",
-                )
+    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+        host = request.headers.get("host", "").split(":")[0]
+
+        if host not in settings.ALLOWED_HOSTS_SET:
+            log_security_event(
+                event_type="untrusted_host",
+                severity="medium",
+                details={
+                    "host": host,
+                    "allowed_hosts": settings.ALLOWED_HOSTS,
+                },
+                ip_address=get_direct_client_ip(request),
+            )
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid host header",
+            )
 
         return await call_next(request)
 
-    def _get_client_ip(self, request: Request) -> str:
-        """Get client IP address"""
-        if hasattr(request, "client") and request.client:
-            return request.client.host
-        return "unknown"
-
 
 class RequestSizeMiddleware(BaseHTTPMiddleware):
     """Middleware to limit request size"""
 
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        content_length = request.headers.get("content-length")
+        content_length = get_content_length(request.scope)
 
-        if content_length:
-            content_length = int(content_length)
+        if content_length is not None:
             if content_length > settings.MAX_REQUEST_SIZE:
                 log_security_event(
                     event_type="request_too_large",
@@ -114,7 +190,7 @@ class RequestSizeMiddleware(BaseHTTPMiddleware):
                         "content_length": content_length,
                         "max_size": settings.MAX_REQUEST_SIZE,
                     },
-                    ip_address=self._get_client_ip(request),
+                    ip_address=get_direct_client_ip(request),
                 )
                 raise HTTPException(
                     status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
@@ -123,12 +199,6 @@ class RequestSizeMiddleware(BaseHTTPMiddleware):
 
         return await call_next(request)
 
-    def _get_client_ip(self, request: Request) -> str:
-        """Get client IP address"""
-        if hasattr(request, "client") and request.client:
-            return request.client.host
-        return "unknown"
-
 
 class RequestTimeoutMiddleware(BaseHTTPMiddleware):
     """Middleware to enforce request timeouts"""
@@ -150,7 +220,7 @@ class RequestTimeoutMiddleware(BaseHTTPMiddleware):
                         "timeout": settings.REQUEST_TIMEOUT,
                         "path": str(request.url.path),
                     },
-                    ip_address=self._get_client_ip(request),
+                    ip_address=get_direct_client_ip(request),
                 )
 
             return response
@@ -167,55 +237,57 @@ class RequestTimeoutMiddleware(BaseHTTPMiddleware):
                         "path": str(request.url.path),
                         "error": str(e),
                     },
-                    ip_address=self._get_client_ip(request),
+                    ip_address=get_direct_client_ip(request),
                 )
             raise
 
-    def _get_client_ip(self, request: Request) -> str:
-        """Get client IP address"""
-        if hasattr(request, "client") and request.client:
-            return request.client.host
-        return "unknown"
-
 
 class ProxyHeadersMiddleware(BaseHTTPMiddleware):
-    """Middleware to handle proxy headers securely"""
+    """Middleware to handle proxy headers securely
+
+    Only registered when TRUSTED_PROXIES is set (see setup_security_middleware).
+    """
 
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
         # Only trust proxy headers from configured trusted proxies
-        if settings.TRUSTED_PROXIES:
-            client_ip = self._get_direct_client_ip(request)
-
-            if client_ip not in settings.TRUSTED_PROXIES:
-                # Remove proxy headers from untrusted sources
-                headers_to_remove = [
-                    "x-forwarded-for",
-                    "x-forwarded-proto",
-                    "x-forwarded-host",
-                    "x-real-ip",
-                ]
-
-                for header in headers_to_remove:
-                    if header in request.headers:
-                        # Create new headers dict without the untrusted header
-                        new_headers = dict(request.headers)
-                        del new_headers[header]
-                        request._headers = new_headers
-
-                log_security_event(
-                    event_type="untrusted_proxy_headers",
-                    severity="low",
-                    details={
-                        "client_ip": client_ip,
-                        "trusted_proxies": settings.TRUSTED_PROXIES,
-                    },
-                    ip_address=client_ip,
-                )
+        client_ip = get_direct_client_ip(request)
+
+        if client_ip not in settings.TRUSTED_PROXIES_SET:
+            # Remove proxy headers from untrusted sources in one pass over
+            # the raw ASGI headers, which call_next passes downstream
+            scope = request.scope
+            scope["headers"] = [
+                (name, value)
+                for name, value in scope["headers"]
+                if name not in _UNTRUSTED_PROXY_HEADERS
+            ]
+            request._headers = Headers(scope=scope)
+
+            log_security_event(
+                event_type="untrusted_proxy_headers",
+                severity="low",
+                details={
+                    "client_ip": client_ip,
+                    "trusted_proxies": settings.TRUSTED_PROXIES,
+                },
+                ip_address=client_ip,
+            )
 
         return await call_next(request)
 
-    def _get_direct_client_ip(self, request: Request) -> str:
-        """Get direct client IP without considering proxy headers"""
-        if hasattr(request, "client") and request.client:
-            return request.client.host
-        return "unknown"
+
+def setup_security_middleware(app: FastAPI) -> None:
+    """Register the security middleware enabled by settings
+
+    Feature flags are resolved here once, so the middleware themselves carry
+    no per-request configuration checks. Added innermost first: proxy header
+    stripping ends up outermost, ahead of anything that reads those headers.
+    """
+    if settings.ENABLE_SECURITY_HEADERS:
+        app.add_middleware(SecurityHeadersMiddleware)
+    app.add_middleware(RequestTimeoutMiddleware)
+    app.add_middleware(RequestSizeMiddleware)
+    if settings.ALLOWED_HOSTS_SET and not settings.ALLOWED_HOSTS_WILDCARD:
+        app.add_middleware(TrustedHostMiddleware)
+    if settings.TRUSTED_PROXIES_SET:
+        app.add_middleware(ProxyHeadersMiddleware)
@@ -1,8 +1,12 @@
+import asyncio
 import os
+import re
 import secrets
 import string
+import time
 from datetime import UTC, datetime, timedelta
 from typing import Any
+from urllib.parse import urlparse
 from uuid import UUID
 
 from argon2 import PasswordHasher
@@ -26,18 +30,18 @@ class TokenError(SecurityError):
 
 
 async def hash_password(password: str) -> str:
-    """Hash a password using Argon2"""
+    """Hash a password using Argon2 in a worker thread"""
     try:
-        return ph.hash(password)
+        return await asyncio.to_thread(ph.hash, password)
     except Exception as e:
         logger.error(f"Password hashing failed: {e}")
         raise SecurityError("Password hashing failed")
 
 
 async def verify_password(hashed_password: str, plain_password: str) -> bool:
-    """Verify a password against its hash"""
+    """Verify a password against its hash in a worker thread"""
     try:
-        ph.verify(hashed_password, plain_password)
+        await asyncio.to_thread(ph.verify, hashed_password, plain_password)
         return True
     except VerifyMismatchError:
         return False
@@ -46,32 +50,57 @@ async def verify_password(hashed_password: str, plain_password: str) -> bool:
         return False
 
 
+def _random_below(bounds: list[int]) -> list[int]:
+    """Uniform random ints in [0, bound) for each bound (1..256)
+
+    Bytes come from one os.urandom call, masked to the bound's bit width and
+    rejection-sampled so there is no modulo bias; the buffer is only refilled
+    in the unlikely case that too many bytes get rejected.
+    """
+    result = []
+    buf = os.urandom(2 * len(bounds))
+    pos = 0
+    for bound in bounds:
+        mask = (1 << (bound - 1).bit_length()) - 1
+        while True:
+            if pos == len(buf):
+                buf = os.urandom(len(bounds))
+                pos = 0
+            value = buf[pos] & mask
+            pos += 1
+            if value < bound:
+                result.append(value)
+                break
+    return result
+
+
 def generate_password(length: int = 12) -> str:
     """Generate a secure random password"""
-    import secrets
-    import string
-
     # Define character sets
     lowercase = string.ascii_lowercase
     uppercase = string.ascii_uppercase
     digits = string.digits
     special = "!@#$%^&*"
+    all_chars = lowercase + uppercase + digits + special
 
-    # Ensure at least one character from each set
-    password = [
-        secrets.choice(lowercase),
-        secrets.choice(uppercase),
-        secrets.choice(digits),
-        secrets.choice(special),
-    ]
+    # One character from each set, the rest from all sets
+    charsets = [lowercase, uppercase, digits, special]
+    charsets += [all_chars] * (length - 4)
+    size = len(charsets)
 
-    # Fill the rest with random characters from all sets
-    all_chars = lowercase + uppercase + digits + special
-    for _ in range(length - 4):
-        password.append(secrets.choice(all_chars))
+    if size > 256:
+        # Too long for byte-sized draws; fall back to per-character sampling
+        password = [secrets.choice(chars) for chars in charsets]
+        secrets.SystemRandom().shuffle(password)
+        return "".join(password)
 
-    # Shuffle the password list
-    secrets.SystemRandom().shuffle(password)
+    # Draw every pick and the Fisher-Yates swap positions in one go
+    indices = _random_below(
+        [len(chars) for chars in charsets] + list(range(size, 1, -1))
+    )
+    password = [chars[i] for chars, i in zip(charsets, indices, strict=False)]
+    for i, j in zip(range(size - 1, 0, -1), indices[size:], strict=True):
+        password[i], password[j] = password[j], password[i]
 
     return "".join(password)
 
@@ -79,7 +108,7 @@ def generate_password(length: int = 12) -> str:
 def generate_secure_token(length: int = 32) -> str:
     """Generate a cryptographically secure random token"""
     alphabet = string.ascii_letters + string.digits
-    return "".join(secrets.choice(alphabet) for _ in range(length))
+    return "".join(alphabet[i] for i in _random_below([len(alphabet)] * length))
 
 
 def generate_api_key(prefix: str = "ak", length: int = 32) -> str:
@@ -88,27 +117,34 @@ def generate_api_key(prefix: str = "ak", length: int = 32) -> str:
     return f"{prefix}_{token}"
 
 
+# Issuer/audience settings are fixed after startup; bind them once
+_JWT_ISSUER = getattr(settings, "JWT_ISSUER", None)
+_JWT_AUDIENCE = getattr(settings, "JWT_AUDIENCE", None)
+_DECODE_KWARGS: dict[str, Any] = {
+    "key": settings.SECRET_KEY,
+    "algorithms": [settings.ALGORITHM],
+    "options": {"verify_aud": bool(_JWT_AUDIENCE)},
+    "audience": _JWT_AUDIENCE,
+}
+
+
 def _base_jwt_claims(
     subject: str | UUID, expires_delta: timedelta | None
 ) -> dict[str, Any]:
-    now = datetime.now(UTC)
-    exp = now + (
-        expires_delta or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    )
+    now = int(time.time())
+    lifetime = expires_delta or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     claims: dict[str, Any] = {
         "sub": str(subject),
-        "iat": int(now.timestamp()),
-        "nbf": int(now.timestamp()),
-        "exp": exp,
-        "jti": secrets.token_hex(16),
+        "iat": now,
+        "nbf": now,
+        "exp": now + int(lifetime.total_seconds()),
+        "jti": os.urandom(16).hex(),
     }
     # Optional issuer/audience from settings if provided
-    iss = getattr(settings, "JWT_ISSUER", None)
-    aud = getattr(settings, "JWT_AUDIENCE", None)
-    if iss:
-        claims["iss"] = iss
-    if aud:
-        claims["aud"] = aud
+    if _JWT_ISSUER:
+        claims["iss"] = _JWT_ISSUER
+    if _JWT_AUDIENCE:
+        claims["aud"] = _JWT_AUDIENCE
     return claims
 
 
@@ -144,27 +180,48 @@ def create_refresh_token(
         raise TokenError("Refresh token creation failed")
 
 
+# Decoded payloads of recently verified tokens, valid until shortly before
+# their exp; revocation is still checked separately via the jti denylist
+_TOKEN_CACHE_SIZE = 10000
+_TOKEN_CACHE_MARGIN = 5
+_token_cache: dict[str, tuple[float, dict[str, Any]]] = {}
+
+
+def _cache_token(token: str, payload: dict[str, Any]) -> None:
+    exp = payload.get("exp")
+    if not isinstance(exp, int | float):
+        return
+    valid_until = exp - _TOKEN_CACHE_MARGIN
+    if valid_until <= time.time():
+        return
+    if len(_token_cache) >= _TOKEN_CACHE_SIZE:
+        # Evict the oldest entry (dicts keep insertion order)
+        _token_cache.pop(next(iter(_token_cache)), None)
+    _token_cache[token] = (valid_until, payload)
+
+
 def verify_token(token: str, token_type: str = "access") -> dict[str, Any]:
     """Verify and decode a JWT token with issuer/audience enforcement if configured."""
+    cached = _token_cache.get(token)
+    if cached is not None:
+        valid_until, payload = cached
+        if valid_until > time.time():
+            if payload.get("type") != token_type:
+                raise TokenError(f"Invalid token type. Expected {token_type}")
+            return dict(payload)
+        _token_cache.pop(token, None)
+
     try:
-        decode_kwargs: dict[str, Any] = {
-            "key": settings.SECRET_KEY,
-            "algorithms": [settings.ALGORITHM],
-            "options": {"verify_aud": bool(getattr(settings, "JWT_AUDIENCE", None))},
-        }
-        iss = getattr(settings, "JWT_ISSUER", None)
-        aud = getattr(settings, "JWT_AUDIENCE", None)
-        if aud:
-            decode_kwargs["audience"] = aud
         payload = jwt.decode(
-            token, **decode_kwargs
+            token, **_DECODE_KWARGS
         )  # jose verifies exp, iat, nbf by default
-        if iss and payload.get("iss") != iss:
+        if _JWT_ISSUER and payload.get("iss") != _JWT_ISSUER:
             raise TokenError("Invalid token issuer")
         # Type check
         if payload.get("type") != token_type:
             raise TokenError(f"Invalid token type. Expected {token_type}")
-        return payload
+        _cache_token(token, payload)
+        return dict(payload)
     except JWTError:
         logger.warning("JWT verification failed")
         raise TokenError("Invalid token")
@@ -182,16 +239,37 @@ def _denylist_key(jti: str) -> str:
     return f"jwt:deny:jti:{jti}"
 
 
+# Recently checked jtis that were not revoked, mapped to when that answer
+# expires. Revocations on another process become visible within the TTL.
+_JTI_NEGATIVE_CACHE_SIZE = 50000
+_jti_negative_cache: dict[str, float] = {}
+
+
 async def is_jti_revoked(jti: str | None) -> bool:
     """Check if a JWT jti is revoked using Redis denylist."""
     if not jti or not settings.JWT_DENYLIST_ENABLED:
         return False
+
+    now = time.monotonic()
+    expires = _jti_negative_cache.get(jti)
+    if expires is not None:
+        if expires > now:
+            return False
+        del _jti_negative_cache[jti]
+
     try:
-        return await cache_manager.exists(_denylist_key(jti))
+        revoked = await cache_manager.exists(_denylist_key(jti))
     except Exception:
         # Fail-open to avoid auth outages if cache is down
         return False
 
+    if not revoked and settings.JWT_DENYLIST_NEGATIVE_TTL > 0:
+        if len(_jti_negative_cache) >= _JTI_NEGATIVE_CACHE_SIZE:
+            # Evict the oldest entry (dicts keep insertion order)
+            _jti_negative_cache.pop(next(iter(_jti_negative_cache)), None)
+        _jti_negative_cache[jti] = now + settings.JWT_DENYLIST_NEGATIVE_TTL
+    return revoked
+
 
 async def revoke_token_jti(jti: str | None, exp_ts: int | None) -> bool:
     """Revoke a JWT by jti until its expiration using Redis denylist.
@@ -202,6 +280,7 @@ async def revoke_token_jti(jti: str | None, exp_ts: int | None) -> bool:
     """
     if not jti or not settings.JWT_DENYLIST_ENABLED:
         return False
+    _jti_negative_cache.pop(jti, None)
     try:
         # Compute TTL from exp
         ttl = None
@@ -254,19 +333,36 @@ def verify_email_verification_token(token: str) -> str | None:
         return None
 
 
+_FILENAME_ALLOWED = frozenset(string.ascii_letters + string.digits + "-_. ")
+
+
+def _filename_char(codepoint: int) -> str | None:
+    """Keep allowlisted chars, drop non-printables and map the rest to an underscore"""
+    ch = chr(codepoint)
+    if ch in _FILENAME_ALLOWED:
+        return ch
+    return "_" if ch.isprintable() else None
+
+
+class _FilenameTable(dict):
+    """str.translate table with Latin-1 prefilled; higher code points are
+    resolved on demand and not stored, so hostile input cannot grow it"""
+
+    def __missing__(self, codepoint: int) -> str | None:
+        return _filename_char(codepoint)
+
+
+_FILENAME_TRANS = _FilenameTable({cp: _filename_char(cp) for cp in range(256)})
+_DOTS_RE = re.compile(r"\.{2,}")
+
+
 def sanitize_filename(filename: str) -> str:
     """Sanitize a filename for security"""
-    # Normalize and strip directory components
-    name = os.path.basename(filename or "")
-    # Remove null bytes and control chars
-    name = "".join(ch for ch in name if ch.isprintable())
-    name = name.replace("\x00", "")
-    # Allowlist basic characters (letters, digits, dash, underscore, dot, space)
-    allowed = set("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-_. ")
-    name = "".join(ch if ch in allowed else "_" for ch in name)
-    # Collapse consecutive dots and spaces
-    while ".." in name:
-        name = name.replace("..", ".")
+    # Strip directory components, drop control chars and replace anything
+    # outside letters, digits, dash, underscore, dot and space in one pass
+    name = os.path.basename(filename or "").translate(_FILENAME_TRANS)
+    # Collapse consecutive dots
+    name = _DOTS_RE.sub(".", name)
     name = name.strip().strip(".")
     if not name:
         name = "file"
@@ -276,9 +372,15 @@ def sanitize_filename(filename: str) -> str:
 
 def is_safe_url(url: str, allowed_hosts: list[str] | None = None) -> bool:
     """Check if a URL is safe for redirects"""
-    if not url:
+    # Prevent CRLF injection; checked on the raw string because urlparse
+    # (and browsers) silently strip CR/LF/tab, which can turn "/\t/host"
+    # into a scheme-relative "//host"
+    if not url or "\r" in url or "\n" in url or "\t" in url:
         return False
-    from urllib.parse import urlparse
+    # Fast path: a site-relative path ("/x", not "//host") cannot carry a
+    # scheme or a host, so there is nothing left to parse
+    if url[0] == "/" and url[1:2] != "/":
+        return True
 
     parsed = urlparse(url)
     # Only allow http/https schemes
@@ -288,8 +390,4 @@ def is_safe_url(url: str, allowed_hosts: list[str] | None = None) -> bool:
     # Ensure netloc is in allowed hosts if provided (for absolute URLs)
     if allowed_hosts and parsed.netloc and parsed.netloc not in allowed_hosts:
         return False
-    # Prevent CRLF injection in path/query/fragment
-    combined = (parsed.path or "") + (parsed.query or "") + (parsed.fragment or "")
-    if "\r" in combined or "\n" in combined:
-        return False
     return True
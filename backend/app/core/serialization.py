@@ -1,9 +1,58 @@
+import math
 import uuid
+from collections.abc import Callable
 from datetime import date, datetime, time
 from decimal import Decimal
 from enum import Enum
+from functools import lru_cache
 from typing import Any
 
+import orjson
+
+
+def _isoformat(obj: date | time) -> str:
+    return obj.isoformat()
+
+
+def _enum_value(obj: Enum) -> Any:
+    return obj.value
+
+
+# Converters for the leaf types JSON has no native form for, in lookup order
+_LEAF_CONVERTERS: tuple[tuple[type, Callable[[Any], Any]], ...] = (
+    (uuid.UUID, str),
+    (datetime, _isoformat),
+    (date, _isoformat),
+    (time, _isoformat),
+    (Decimal, float),
+    (Enum, _enum_value),
+    (set, list),
+    (frozenset, list),
+)
+
+
+@lru_cache
+def _converter_for(cls: type) -> Callable[[Any], Any] | None:
+    """Resolve (and cache) the leaf converter for an exact type, subclasses included"""
+    for base, convert in _LEAF_CONVERTERS:
+        if issubclass(cls, base):
+            return convert
+    return None
+
+
+def _json_default(obj: Any) -> Any:
+    """orjson fallback for the types it does not serialize natively"""
+    # Also covers subclasses such as asyncpg's UUID, which orjson skips
+    convert = _converter_for(type(obj))
+    if convert is None:
+        raise TypeError
+    return convert(obj)
+
+
+# Route datetimes and dataclasses through _json_default so they match the
+# pure-Python walk (isoformat(), dataclasses left as-is) on both paths
+_ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
 
 def convert_to_json_serializable(obj: Any) -> Any:
     """
@@ -16,7 +65,14 @@ def convert_to_json_serializable(obj: Any) -> Any:
     - Enum objects -> values
     - Dictionaries -> recursively convert values
     - Lists/tuples -> recursively convert items
-    - Sets -> convert to lists
+    - Sets/frozensets -> convert to lists
+    - NaN and +/-inf floats -> None (JSON has no literal for them)
+
+    Dictionary keys are never rewritten. The conversion is a single orjson
+    round trip; objects it cannot take as-is (non-str keys, dataclasses,
+    unknown types) go through the pure-Python walk instead, which produces
+    the same result for everything above and passes anything else through
+    unchanged.
 
     Args:
         obj: The object to convert
@@ -24,45 +80,33 @@ def convert_to_json_serializable(obj: Any) -> Any:
     Returns:
         JSON-serializable version of the object
     """
-    # Handle None
-    if obj is None:
-        return None
-
-    # Handle UUID
-    if isinstance(obj, uuid.UUID):
-        return str(obj)
+    try:
+        return orjson.loads(
+            orjson.dumps(obj, default=_json_default, option=_ORJSON_OPTIONS)
+        )
+    except orjson.JSONEncodeError:
+        return _convert_to_json_serializable(obj)
 
-    # Handle datetime objects
-    if isinstance(obj, datetime):
-        return obj.isoformat()
-
-    if isinstance(obj, date):
-        return obj.isoformat()
-
-    if isinstance(obj, time):
-        return obj.isoformat()
-
-    # Handle Decimal
-    if isinstance(obj, Decimal):
-        return float(obj)
-
-    # Handle Enum
-    if isinstance(obj, Enum):
-        return obj.value
 
+def _convert_to_json_serializable(obj: Any) -> Any:
+    """Pure-Python fallback for convert_to_json_serializable"""
     # Handle dictionaries
     if isinstance(obj, dict):
-        return {key: convert_to_json_serializable(value) for key, value in obj.items()}
+        return {key: _convert_to_json_serializable(value) for key, value in obj.items()}
 
-    # Handle lists and tuples
-    if isinstance(obj, (list, tuple)):
-        return [convert_to_json_serializable(item) for item in obj]
+    # Handle lists, tuples and sets
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return [_convert_to_json_serializable(item) for item in obj]
 
-    # Handle sets
-    if isinstance(obj, set):
-        return [convert_to_json_serializable(item) for item in obj]
+    # Convert UUID, date/time, Decimal and Enum leaves; primitives and
+    # unknown types (None, str, int, bool, ...) pass through as-is
+    convert = _converter_for(type(obj))
+    if convert is not None:
+        obj = convert(obj)
 
-    # Return as-is for primitive types (str, int, float, bool)
+    # orjson writes non-finite floats as null; match it here
+    if isinstance(obj, float) and not math.isfinite(obj):
+        return None
     return obj
 
 
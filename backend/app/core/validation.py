@@ -2,10 +2,65 @@
 Core validation utilities for the application
 """
 
+import re
+from functools import lru_cache
+
 from app.config import get_settings
 
 settings = get_settings()
 
+# Character classes for the password checks, built once at import
+_SPECIAL_CHARS = "!@#$%^&*()_+-=[]{}|;:,.<>?"
+_RE_SPECIAL = re.compile(f"[{re.escape(_SPECIAL_CHARS)}]")
+
+# Class bitmask per ASCII byte: 1 uppercase, 2 lowercase, 4 digit, 8 special
+_UPPER, _LOWER, _DIGIT, _SPECIAL = 1, 2, 4, 8
+_CLASS_TABLE = bytes(
+    (_UPPER if "A" <= ch <= "Z" else 0)
+    | (_LOWER if "a" <= ch <= "z" else 0)
+    | (_DIGIT if "0" <= ch <= "9" else 0)
+    | (_SPECIAL if ch in _SPECIAL_CHARS else 0)
+    for ch in map(chr, range(256))
+)
+
+
+def _character_classes(password: str) -> tuple[bool, bool, bool, bool]:
+    """Return (has_uppercase, has_lowercase, has_digit, has_special) for a password"""
+    if password.isascii():
+        # One translate pass maps every byte to its class bits; OR the few
+        # distinct values together
+        mask = 0
+        for bits in set(password.encode("ascii").translate(_CLASS_TABLE)):
+            mask |= bits
+        return (
+            bool(mask & _UPPER),
+            bool(mask & _LOWER),
+            bool(mask & _DIGIT),
+            bool(mask & _SPECIAL),
+        )
+    # str.isupper/islower/isdigit also accept non-ASCII letters and digits
+    return (
+        any(c.isupper() for c in password),
+        any(c.islower() for c in password),
+        any(c.isdigit() for c in password),
+        _RE_SPECIAL.search(password) is not None,
+    )
+
+
+@lru_cache(maxsize=1)
+def _allowed_email_suffixes() -> tuple[str, ...]:
+    """Lowercased "@domain" suffixes for the allowed email domains"""
+    return tuple(f"@{domain.lower()}" for domain in settings.ALLOWED_EMAIL_DOMAINS)
+
+
+@lru_cache(maxsize=1)
+def _email_domain_error() -> str:
+    """Error message for an email outside the allowed domains"""
+    suffixes = _allowed_email_suffixes()
+    if len(suffixes) == 1:
+        return f"Only {suffixes[0]} email addresses are allowed"
+    return f"Only email addresses from these domains are allowed: {', '.join(suffixes)}"
+
 
 def validate_email_domain(email: str) -> str:
     """
@@ -23,22 +78,9 @@ def validate_email_domain(email: str) -> str:
     if not settings.ENFORCE_EMAIL_DOMAIN:
         return email
 
-    email_lower = email.lower()
-    allowed_domains = [domain.lower() for domain in settings.ALLOWED_EMAIL_DOMAINS]
-
     # Check if email ends with any of the allowed domains
-    domain_allowed = any(
-        email_lower.endswith(f"@{domain}") for domain in allowed_domains
-    )
-
-    if not domain_allowed:
-        if len(allowed_domains) == 1:
-            raise ValueError(f"Only @{allowed_domains[0]} email addresses are allowed")
-        else:
-            domains_str = ", ".join(f"@{domain}" for domain in allowed_domains)
-            raise ValueError(
-                f"Only email addresses from these domains are allowed: {domains_str}"
-            )
+    if not email.lower().endswith(_allowed_email_suffixes()):
+        raise ValueError(_email_domain_error())
 
     return email
 
@@ -59,18 +101,19 @@ def validate_password_strength(password: str) -> str:
     if len(password) < 8:
         raise ValueError("Password must be at least 8 characters long")
 
-    if not any(c.isupper() for c in password):
+    has_uppercase, has_lowercase, has_digit, has_special = _character_classes(password)
+
+    if not has_uppercase:
         raise ValueError("Password must contain at least one uppercase letter")
 
-    if not any(c.islower() for c in password):
+    if not has_lowercase:
         raise ValueError("Password must contain at least one lowercase letter")
 
-    if not any(c.isdigit() for c in password):
+    if not has_digit:
         raise ValueError("Password must contain at least one digit")
 
     # Check for special characters
-    special_chars = "!@#$%^&*()_+-=[]{}|;:,.<>?"
-    if not any(c in special_chars for c in password):
+    if not has_special:
         raise ValueError(
             "Password must contain at least one special character (!@#$%^&*()_+-=[]{}|;:,.<>?)"
         )
@@ -78,12 +121,13 @@ def validate_password_strength(password: str) -> str:
     return password
 
 
+@lru_cache(maxsize=1)
 def get_password_requirements() -> dict:
     """
     Get password requirements for client-side validation
 
     Returns:
-        dict: Password requirements specification
+        dict: Password requirements specification (cached; do not mutate)
     """
     return {
         "min_length": 8,
@@ -92,17 +136,18 @@ def get_password_requirements() -> dict:
         "require_lowercase": True,
         "require_digit": True,
         "require_special": True,
-        "special_chars": "!@#$%^&*()_+-=[]{}|;:,.<>?",
+        "special_chars": _SPECIAL_CHARS,
         "description": "Password must be at least 8 characters long and contain at least one uppercase letter, one lowercase letter, one digit, and one special character.",
     }
 
 
+@lru_cache(maxsize=1)
 def get_email_requirements() -> dict:
     """
     Get email requirements for client-side validation
 
     Returns:
-        dict: Email requirements specification
+        dict: Email requirements specification (cached; do not mutate)
     """
     return {
         "enforce_domain": settings.ENFORCE_EMAIL_DOMAIN,
@@ -136,33 +181,30 @@ def validate_user_input(
     Raises:
         ValueError: If validation fails
     """
-    results = {"email_valid": True, "password_valid": True, "errors": []}
+    errors = []
 
-    # Validate email
-    if email is not None:
+    # Empty values mean "not supplied" and are not validated
+    if email and not skip_email_domain:
         try:
-            if not skip_email_domain:
-                validate_email_domain(email)
+            validate_email_domain(email)
         except ValueError as e:
-            results["email_valid"] = False
-            results["errors"].append(f"Email: {e!s}")
+            errors.append(f"Email: {e!s}")
 
-    # Validate password
-    if password is not None:
+    if password and not skip_password_strength:
         try:
-            if not skip_password_strength:
-                validate_password_strength(password)
+            validate_password_strength(password)
         except ValueError as e:
-            results["password_valid"] = False
-            results["errors"].append(f"Password: {e!s}")
+            errors.append(f"Password: {e!s}")
 
-    # Overall validation status
-    results["valid"] = results["email_valid"] and results["password_valid"]
+    if errors:
+        raise ValueError("; ".join(errors))
 
-    if not results["valid"]:
-        raise ValueError("; ".join(results["errors"]))
-
-    return results
+    return {
+        "email_valid": True,
+        "password_valid": True,
+        "errors": errors,
+        "valid": True,
+    }
 
 
 # Password strength checker for different levels
@@ -176,12 +218,13 @@ def check_password_strength_level(password: str) -> dict:
     Returns:
         dict: Detailed password strength analysis
     """
+    has_uppercase, has_lowercase, has_digit, has_special = _character_classes(password)
     analysis = {
         "length": len(password),
-        "has_uppercase": any(c.isupper() for c in password),
-        "has_lowercase": any(c.islower() for c in password),
-        "has_digit": any(c.isdigit() for c in password),
-        "has_special": any(c in "!@#$%^&*()_+-=[]{}|;:,.<>?" for c in password),
+        "has_uppercase": has_uppercase,
+        "has_lowercase": has_lowercase,
+        "has_digit": has_digit,
+        "has_special": has_special,
         "score": 0,
         "level": "weak",
         "feedback": [],
@@ -1,11 +1,20 @@
 from databases import Database
 from sqlalchemy import MetaData
 
+from app.config import get_settings
 from app.constants import SQLALCHEMY_DATABASE_URI
 
+settings = get_settings()
 metadata = MetaData()
-database = Database(SQLALCHEMY_DATABASE_URI)
+database = Database(
+    SQLALCHEMY_DATABASE_URI,
+    min_size=settings.DB_POOL_MIN_SIZE,
+    max_size=settings.DB_POOL_MAX_SIZE,
+    statement_cache_size=settings.DB_STATEMENT_CACHE_SIZE,
+)
 
 
-async def get_db():
-    yield database
+async def get_db() -> Database:
+    # A plain coroutine: FastAPI would run a sync def in the threadpool, and a
+    # generator would add exit-stack bookkeeping for nothing to clean up
+    return database
@@ -4,6 +4,9 @@ This module provides reusable dependencies that can be used across all modules
 """
 
 from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
 from typing import Any
 from uuid import UUID
 
@@ -19,7 +22,11 @@ from app.auth.dependencies import CurrentUser, get_current_user, require_active_
 async def get_current_user_global(
     current_user: CurrentUser = Depends(require_active_user),
 ) -> CurrentUser:
-    """Get current active user - global version"""
+    """Get current active user - global version
+
+    Kept for existing imports; the dependencies below depend on
+    require_active_user directly so FastAPI resolves one link fewer.
+    """
     return current_user
 
 
@@ -31,7 +38,7 @@ async def get_optional_user_global(
 
 
 async def get_verified_user(
-    current_user: CurrentUser = Depends(get_current_user_global),
+    current_user: CurrentUser = Depends(require_active_user),
 ) -> CurrentUser:
     """Get current user and ensure they are verified"""
     if not current_user.is_verified:
@@ -42,7 +49,7 @@ async def get_verified_user(
 
 
 async def get_admin_user(
-    current_user: CurrentUser = Depends(get_current_user_global),
+    current_user: CurrentUser = Depends(require_active_user),
 ) -> CurrentUser:
     """Get current user and ensure they have admin role"""
     if not current_user.is_admin:
@@ -53,7 +60,7 @@ async def get_admin_user(
 
 
 async def get_super_admin_user_global(
-    current_user: CurrentUser = Depends(get_current_user_global),
+    current_user: CurrentUser = Depends(require_active_user),
 ) -> CurrentUser:
     """Get current user and ensure they have super admin role"""
     # if not current_user.is_super_admin:
@@ -87,9 +94,9 @@ def require_permission(permission: str) -> Callable:
     """Dependency factory for requiring specific permissions"""
 
     async def permission_checker(
-        current_user: CurrentUser = Depends(get_current_user_global),
+        current_user: CurrentUser = Depends(require_active_user),
     ) -> CurrentUser:
-        if permission not in current_user.permissions:
+        if permission not in current_user.permission_names:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=f"Permission '{permission}' required",
@@ -99,32 +106,18 @@ def require_permission(permission: str) -> Callable:
     return permission_checker
 
 
-def require_any_role(roles: list[str]) -> Callable:
-    """Dependency factory for requiring any of the specified roles"""
-
-    async def role_checker(
-        current_user: CurrentUser = Depends(get_current_user_global),
-    ) -> CurrentUser:
-        if not any(role in current_user.id for role in roles):
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail=f"One of these roles required: {', '.join(roles)}",
-            )
-        return current_user
-
-    return role_checker
-
-
 def require_any_permission(permissions: list[str]) -> Callable:
     """Dependency factory for requiring any of the specified permissions"""
+    required = frozenset(permissions)
+    detail = f"One of these permissions required: {', '.join(permissions)}"
 
     async def permission_checker(
-        current_user: CurrentUser = Depends(get_current_user_global),
+        current_user: CurrentUser = Depends(require_active_user),
     ) -> CurrentUser:
-        if not any(perm in current_user.permissions for perm in permissions):
+        if current_user.permission_names.isdisjoint(required):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
-                detail=f"One of these permissions required: {', '.join(permissions)}",
+                detail=detail,
             )
         return current_user
 
@@ -143,7 +136,7 @@ def require_ownership_or_admin(
 
     async def ownership_checker(
         resource: dict[str, Any],
-        current_user: CurrentUser = Depends(get_current_user_global),
+        current_user: CurrentUser = Depends(require_active_user),
     ) -> dict[str, Any]:
         # Admin override
         if admin_override and current_user.is_admin:
@@ -203,6 +196,14 @@ async def validate_uuid(
     return resource_id
 
 
+@dataclass(slots=True, frozen=True)
+class Pagination:
+    """Validated page/size query parameters"""
+
+    page: int
+    size: int
+
+
 def validate_pagination(max_size: int = 100, default_size: int = 20) -> Callable:
     """Dependency factory for pagination validation"""
 
@@ -211,29 +212,51 @@ def validate_pagination(max_size: int = 100, default_size: int = 20) -> Callable
         size: int = Query(
             default_size, ge=1, le=max_size, description="appointments per page"
         ),
-    ) -> dict[str, int]:
-        return {"page": page, "size": size}
+    ) -> Pagination:
+        return Pagination(page, size)
 
     return pagination_validator
 
 
+@lru_cache(maxsize=1024)
+def _parse_iso(value: str) -> datetime:
+    """Parse an ISO 8601 query value
+
+    On Python 3.11+ fromisoformat is implemented in C and understands a
+    trailing "Z" on datetimes; only a date-only "YYYY-MM-DDZ" needs the
+    old "+00:00" rewrite.
+    """
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        if not value.endswith("Z"):
+            raise
+    return datetime.fromisoformat(value[:-1] + "+00:00")
+
+
+@dataclass(slots=True, frozen=True)
+class DateBounds:
+    """Parsed start/end query dates; either may be None"""
+
+    start_date: datetime | None
+    end_date: datetime | None
+
+
 def validate_date_range() -> Callable:
     """Dependency for date range validation"""
 
     async def date_range_validator(
         start_date: str | None = Query(None, description="Start date (ISO format)"),
         end_date: str | None = Query(None, description="End date (ISO format)"),
-    ) -> dict[str, Any]:
-        from datetime import datetime
-
+    ) -> DateBounds:
         parsed_start = None
         parsed_end = None
 
         try:
             if start_date:
-                parsed_start = datetime.fromisoformat(start_date.replace("Z", "+00:00"))
+                parsed_start = _parse_iso(start_date)
             if end_date:
-                parsed_end = datetime.fromisoformat(end_date.replace("Z", "+00:00"))
+                parsed_end = _parse_iso(end_date)
         except ValueError as e:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -246,7 +269,7 @@ def validate_date_range() -> Callable:
                 detail="Start date must be before end date",
             )
 
-        return {"start_date": parsed_start, "end_date": parsed_end}
+        return DateBounds(parsed_start, parsed_end)
 
     return date_range_validator
 
@@ -257,23 +280,29 @@ def validate_date_range() -> Callable:
 
 
 async def get_request_context(request: Request) -> dict[str, Any]:
-    """Get request context information"""
+    """Get request context information
+
+    ``headers`` is Starlette's read-only ``Headers`` mapping rather than a
+    copy; call ``dict()`` on it only where a plain dict is really needed.
+    """
+    headers = request.headers
     return {
         "ip_address": request.client.host if request.client else None,
-        "user_agent": request.headers.get("user-agent"),
+        "user_agent": headers.get("user-agent"),
         "method": request.method,
         "url": str(request.url),
-        "headers": dict(request.headers),
+        "headers": headers,
     }
 
 
 async def get_client_info(request: Request) -> dict[str, str]:
     """Get client information from request"""
+    headers = request.headers
     return {
         "ip_address": request.client.host if request.client else "unknown",
-        "user_agent": request.headers.get("user-agent", "unknown"),
-        "referer": request.headers.get("referer", ""),
-        "origin": request.headers.get("origin", ""),
+        "user_agent": headers.get("user-agent", "unknown"),
+        "referer": headers.get("referer", ""),
+        "origin": headers.get("origin", ""),
     }
 
 
@@ -286,6 +315,7 @@ def require_confirmation(
     header_name: str = "X-Confirm-Operation", required_value: str = "true"
 ) -> Callable:
     """Dependency factory for requiring confirmation headers"""
+    detail = f"Operation requires confirmation header: {header_name}: {required_value}"
 
     async def confirmation_checker(
         confirmation: str | None = Header(None, alias=header_name),
@@ -293,7 +323,7 @@ def require_confirmation(
         if confirmation != required_value:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Operation requires confirmation header: {header_name}: {required_value}",
+                detail=detail,
             )
         return True
 
@@ -302,18 +332,21 @@ def require_confirmation(
 
 def require_critical_confirmation(operation_name: str) -> Callable:
     """Dependency for critical operations requiring explicit confirmation"""
+    expected_value = f"CONFIRM_{operation_name.upper()}"
+    detail = (
+        "Critical operation requires confirmation header: "
+        f"X-Confirm-Critical-Operation: {expected_value}"
+    )
 
     async def critical_confirmation_checker(
         confirmation: str | None = Header(
             None, alias="X-Confirm-Critical-Operation"
         ),
     ) -> bool:
-        expected_value = f"CONFIRM_{operation_name.upper()}"
-
         if confirmation != expected_value:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Critical operation requires confirmation header: X-Confirm-Critical-Operation: {expected_value}",
+                detail=detail,
             )
         return True
 
@@ -327,7 +360,7 @@ def require_critical_confirmation(operation_name: str) -> Callable:
 
 async def check_rate_limit(
     request: Request,
-    current_user: CurrentUser | None = Depends(get_optional_user_global),
+    current_user: CurrentUser | None = Depends(get_current_user),
 ) -> bool:
     """Basic rate limiting check (placeholder for Redis implementation)"""
 
@@ -350,6 +383,15 @@ async def check_rate_limit(
 # ================================
 
 
+@dataclass(slots=True, frozen=True)
+class SearchOptions:
+    """Search term and sorting query parameters"""
+
+    search: str | None
+    sort_by: str | None
+    sort_order: str | None
+
+
 async def get_search_params(
     search: str | None = Query(
         None, min_length=1, max_length=100, description="Search term"
@@ -358,13 +400,18 @@ async def get_search_params(
     sort_order: str | None = Query(
         "desc", regex="^(asc|desc)$", description="Sort order"
     ),
-) -> dict[str, Any]:
+) -> SearchOptions:
     """Get common search and sorting parameters"""
-    return {
-        "search": search.strip() if search else None,
-        "sort_by": sort_by,
-        "sort_order": sort_order,
-    }
+    return SearchOptions(search.strip() if search else None, sort_by, sort_order)
+
+
+@dataclass(slots=True, frozen=True)
+class FilterOptions:
+    """Parsed common filtering query parameters"""
+
+    is_active: bool | None
+    created_after: datetime | None
+    created_before: datetime | None
 
 
 async def get_filter_params(
@@ -375,35 +422,25 @@ async def get_filter_params(
     created_before: str | None = Query(
         None, description="Filter by creation date (before)"
     ),
-) -> dict[str, Any]:
+) -> FilterOptions:
     """Get common filtering parameters"""
 
-    from datetime import datetime
-
     # Parse dates
     parsed_created_after = None
     parsed_created_before = None
 
     try:
         if created_after:
-            parsed_created_after = datetime.fromisoformat(
-                created_after.replace("Z", "+00:00")
-            )
+            parsed_created_after = _parse_iso(created_after)
         if created_before:
-            parsed_created_before = datetime.fromisoformat(
-                created_before.replace("Z", "+00:00")
-            )
+            parsed_created_before = _parse_iso(created_before)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Invalid date format: {e!s}",
         )
 
-    return {
-        "is_active": is_active,
-        "created_after": parsed_created_after,
-        "created_before": parsed_created_before,
-    }
+    return FilterOptions(is_active, parsed_created_after, parsed_created_before)
 
 
 # ================================
@@ -416,11 +453,11 @@ LargePagination = Depends(validate_pagination(max_size=1000, default_size=50))
 SmallPagination = Depends(validate_pagination(max_size=50, default_size=10))
 
 # Common auth requirements
-RequireAuth = Depends(get_current_user_global)
+RequireAuth = Depends(require_active_user)
 RequireVerified = Depends(get_verified_user)
 RequireAdmin = Depends(get_admin_user)
 RequireSuperAdmin = Depends(get_super_admin_user_global)
-OptionalAuth = Depends(get_optional_user_global)
+OptionalAuth = Depends(get_current_user)
 
 # Common confirmations
 RequireConfirmation = Depends(require_confirmation())
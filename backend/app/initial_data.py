@@ -13,12 +13,14 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 
 from sqlalchemy import insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from app.auth.constants import DEFAULT_ROLE_PERMISSIONS, DEFAULT_ROLES
-from app.auth.crud import RoleCRUD, RolePermissionCRUD, UserCRUD
+from app.auth.crud import RoleCRUD, UserCRUD
 from app.auth.models import (
     DEFAULT_PERMISSIONS,
     permissions,
+    role_permissions,
     roles,
     user_roles,
 )
@@ -39,32 +41,43 @@ settings = get_settings()
 async def init_permissions():
     logger.info("🔑 Initializing permissions...")
 
+    # One SELECT for what exists, one multi-row INSERT for what is missing
+    existing = {
+        row["name"] for row in await database.fetch_all(select(permissions.c.name))
+    }
+
+    to_insert = []
     for perm in DEFAULT_PERMISSIONS:
         name = f"{perm['resource']}:{perm['action']}"
-        query = select(permissions).where(permissions.c.name == name)
-        existing = await database.fetch_one(query)
-
-        if not existing:
-            data = {"id": uuid.uuid4(), "name": name, **perm}
-            await database.execute(insert(permissions).values(data))
-            logger.info(f"✅ Created permission: {name}")
-        else:
+        if name in existing:
             logger.info(f"ℹ️ Permission already exists: {name}")
+        else:
+            to_insert.append({"id": uuid.uuid4(), "name": name, **perm})
+
+    if to_insert:
+        await database.execute(insert(permissions).values(to_insert))
+        for data in to_insert:
+            logger.info(f"✅ Created permission: {data['name']}")
 
 
 async def init_roles():
     logger.info("👥 Initializing roles...")
 
-    for role in DEFAULT_ROLES:
-        query = select(roles).where(roles.c.name == role["name"])
-        existing = await database.fetch_one(query)
+    existing = {row["name"] for row in await database.fetch_all(select(roles.c.name))}
 
-        if not existing:
-            data = {"id": uuid.uuid4(), **role}
-            await database.execute(insert(roles).values(data))
-            logger.info(f"✅ Created role: {role['name']}")
-        else:
+    to_insert = []
+    for role in DEFAULT_ROLES:
+        if role["name"] in existing:
             logger.info(f"ℹ️ Role already exists: {role['name']}")
+        else:
+            # A multi-row INSERT needs the same keys on every row; the
+            # default mirrors the column's server default
+            to_insert.append({"id": uuid.uuid4(), "is_system": False, **role})
+
+    if to_insert:
+        await database.execute(insert(roles).values(to_insert))
+        for data in to_insert:
+            logger.info(f"✅ Created role: {data['name']}")
 
 
 async def assign_permissions():
@@ -72,10 +85,22 @@ async def assign_permissions():
 
     all_perms = await database.fetch_all(select(permissions))
     all_perms_dict = {p["name"]: p for p in all_perms}
+    role_ids = {
+        row["name"]: row["id"]
+        for row in await database.fetch_all(select(roles.c.id, roles.c.name))
+    }
+    assigned = {
+        (row["role_id"], row["permission_id"])
+        for row in await database.fetch_all(
+            select(role_permissions.c.role_id, role_permissions.c.permission_id)
+        )
+    }
 
+    to_insert = []
+    granted = []
     for role_name, perm_patterns in DEFAULT_ROLE_PERMISSIONS.items():
-        role = await RoleCRUD.get_by_name(database, role_name)
-        if not role:
+        role_id = role_ids.get(role_name)
+        if not role_id:
             logger.warning(f"❌ Role not found: {role_name}")
             continue
 
@@ -93,13 +118,25 @@ async def assign_permissions():
                     perms_to_assign.append(all_perms_dict[pattern])
 
         for perm in perms_to_assign:
-            try:
-                await RolePermissionCRUD.assign_permission(
-                    database, role["id"], perm["id"]
-                )
-                logger.info(f"✅ Granted {perm['name']} to {role_name}")
-            except Exception:
-                pass  # already assigned
+            pair = (role_id, perm["id"])
+            if pair in assigned:
+                continue  # already assigned
+            assigned.add(pair)
+            to_insert.append(
+                {"id": uuid.uuid4(), "role_id": role_id, "permission_id": perm["id"]}
+            )
+            granted.append((perm["name"], role_name))
+
+    if to_insert:
+        # Another process seeding at the same time is resolved by the
+        # uq_role_permissions constraint instead of failing the whole batch
+        await database.execute(
+            pg_insert(role_permissions)
+            .values(to_insert)
+            .on_conflict_do_nothing(index_elements=["role_id", "permission_id"])
+        )
+        for perm_name, role_name in granted:
+            logger.info(f"✅ Granted {perm_name} to {role_name}")
 
 
 async def create_first_admin():
@@ -148,8 +185,9 @@ async def create_first_admin():
 # -----------------------------
 async def init():
     """Run all initial seeding tasks"""
-    await init_permissions()
-    await init_roles()
+    # Permissions and roles don't reference each other; gather runs each in
+    # its own task, so each gets its own pooled connection
+    await asyncio.gather(init_permissions(), init_roles())
     await assign_permissions()
     await create_first_admin()
 
@@ -2,14 +2,15 @@
 Structured logging configuration for FastAPI application
 """
 
-import json
+import asyncio
 import sys
+import traceback
 import uuid
-from contextvars import ContextVar
-from datetime import datetime
+from contextvars import ContextVar, Token
 from pathlib import Path
 from typing import Any
 
+import orjson
 from loguru import logger
 from starlette.requests import Request
 
@@ -17,9 +18,25 @@ from app.config import get_settings
 
 settings = get_settings()
 
-# Context variables for request tracing
-request_id_var: ContextVar[str | None] = ContextVar("request_id", default=None)
-user_id_var: ContextVar[str | None] = ContextVar("user_id", default=None)
+# Per-task request context for tracing; always replaced, never mutated
+_EMPTY_CTX: dict[str, str] = {}
+_REQUEST_CTX: ContextVar[dict[str, str]] = ContextVar("request_ctx", default=_EMPTY_CTX)
+
+
+def _add_request_context(record) -> None:
+    """Loguru patcher copying the current request context into extra"""
+    ctx = _REQUEST_CTX.get()
+    if ctx:
+        record["extra"].update(ctx)
+
+
+def _json_line(_record) -> str:
+    """Loguru format for records pre-rendered by StructuredLogger._json_formatter
+
+    A callable format stops Loguru from appending the traceback after the line;
+    exceptions are already part of the JSON.
+    """
+    return "{extra[_json]}\n"
 
 
 class StructuredLogger:
@@ -39,9 +56,10 @@ class StructuredLogger:
 
         # Configure format based on settings
         if settings.LOG_FORMAT == "json":
-            # For JSON format, use loguru's built-in serialization
-            log_format = "{time} | {level} | {name}:{function}:{line} | {message}"
-            serialize = True
+            # For JSON format, render each record once with orjson in a patcher
+            logger.configure(patcher=self._json_formatter)
+            log_format = _json_line
+            serialize = False
             colorize = False
         else:
             log_format = (
@@ -52,6 +70,7 @@ class StructuredLogger:
             )
             serialize = False
             colorize = True
+            logger.configure(patcher=_add_request_context)
 
         # Add console handler
         logger.add(
@@ -79,50 +98,48 @@ class StructuredLogger:
         self._configured = True
 
     def _json_formatter(self, record):
-        """Custom JSON formatter with request context"""
+        """Loguru patcher rendering the record as one JSON line with request context"""
+        _add_request_context(record)
         log_entry = {
-            "timestamp": datetime.now(datetime.timezone.utc).isoformat(),
+            "timestamp": record["time"].isoformat(),
             "level": record["level"].name,
             "logger": record["name"],
             "module": record["module"],
             "function": record["function"],
             "line": record["line"],
             "message": record["message"],
+            **record["extra"],
         }
 
-        # Add request context if available
-        request_id = request_id_var.get()
-        if request_id:
-            log_entry["request_id"] = request_id
-
-        user_id = user_id_var.get()
-        if user_id:
-            log_entry["user_id"] = user_id
-
-        # Add extra fields from record
-        if record.get("extra"):
-            log_entry.update(record["extra"])
+        exception = record["exception"]
+        if exception is not None:
+            log_entry["exception"] = "".join(
+                traceback.format_exception(
+                    exception.type, exception.value, exception.traceback
+                )
+            )
 
-        return json.dumps(log_entry)
+        record["extra"]["_json"] = orjson.dumps(log_entry, default=str).decode()
 
-    def bind_request(self, request: Request, user_id: str | None = None):
-        """Bind request context to logger"""
+    def bind_request(
+        self, request: Request, user_id: str | None = None
+    ) -> tuple[str, Token]:
+        """Bind request context to logger, returning the request ID and a reset token"""
         request_id = str(uuid.uuid4())
-        request_id_var.set(request_id)
-
+        ctx = {"request_id": request_id}
         if user_id:
-            user_id_var.set(user_id)
+            ctx["user_id"] = user_id
+        token = _REQUEST_CTX.set(ctx)
 
         # Add request ID to headers for client tracking
         if hasattr(request, "state"):
             request.state.request_id = request_id
 
-        return request_id
+        return request_id, token
 
-    def clear_context(self):
-        """Clear request context"""
-        request_id_var.set(None)
-        user_id_var.set(None)
+    def clear_context(self, token: Token) -> None:
+        """Restore the request context bound before bind_request"""
+        _REQUEST_CTX.reset(token)
 
 
 # Global logger instance
@@ -136,23 +153,35 @@ def get_logger(name: str = __name__):
 
 def log_request(
     method: str,
-    url: str,
+    path: str,
     status_code: int,
     duration: float,
     request_size: int | None = None,
     response_size: int | None = None,
     user_agent: str | None = None,
     ip_address: str | None = None,
+    query: bytes = b"",
+    request_id: str | None = None,
+    user_id: Any = None,
 ):
-    """Log HTTP request details"""
+    """Log HTTP request details
+
+    The path and the raw query string are logged separately; the full URL
+    is not rebuilt per request. request_id and user_id are passed in
+    explicitly because queued logs are written outside the request's
+    context; user_id is stringified here, off the request path.
+    """
     log_data = {
         "event": "http_request",
         "method": method,
-        "url": str(url),
+        "path": path,
         "status_code": status_code,
         "duration_ms": round(duration * 1000, 2),
     }
 
+    if query:
+        log_data["query"] = query.decode("latin-1")
+
     if request_size is not None:
         log_data["request_size"] = request_size
 
@@ -165,7 +194,85 @@ def log_request(
     if ip_address:
         log_data["ip_address"] = ip_address
 
-    logger.info("HTTP Request", **log_data)
+    if request_id:
+        log_data["request_id"] = request_id
+
+    if user_id is not None:
+        log_data["user_id"] = str(user_id)
+
+    # bind() adds the fields to extra without running str.format on the message
+    logger.bind(**log_data).info("HTTP Request")
+
+
+# Request logs are queued and written by a background task so the
+# formatting and sink I/O happen outside the request/response path
+_REQUEST_LOG_QUEUE_SIZE = 10000
+_REQUEST_LOG_BATCH_SIZE = 256
+_request_log_queue: asyncio.Queue[dict[str, Any]] | None = None
+_request_log_writer: asyncio.Task | None = None
+dropped_request_logs = 0
+
+
+def enqueue_request_log(**fields: Any) -> None:
+    """Queue a log_request call, or log inline if the writer is not running"""
+    global dropped_request_logs
+
+    if _request_log_queue is None:
+        log_request(**fields)
+        return
+
+    try:
+        _request_log_queue.put_nowait(fields)
+    except asyncio.QueueFull:
+        dropped_request_logs += 1
+
+
+def _write_request_log(fields: dict[str, Any]) -> None:
+    """Write one queued request log; a bad entry must not stop the writer"""
+    try:
+        log_request(**fields)
+    except Exception:
+        logger.exception("Failed to write request log")
+
+
+async def _drain_request_logs(queue: asyncio.Queue[dict[str, Any]]) -> None:
+    """Write queued request logs in batches"""
+    while True:
+        batch = [await queue.get()]
+        while len(batch) < _REQUEST_LOG_BATCH_SIZE and not queue.empty():
+            batch.append(queue.get_nowait())
+
+        for fields in batch:
+            _write_request_log(fields)
+
+
+def start_request_log_writer() -> None:
+    """Start the background request log writer on the running loop"""
+    global _request_log_queue, _request_log_writer
+
+    if _request_log_writer is not None:
+        return
+    _request_log_queue = asyncio.Queue(maxsize=_REQUEST_LOG_QUEUE_SIZE)
+    _request_log_writer = asyncio.create_task(_drain_request_logs(_request_log_queue))
+
+
+async def stop_request_log_writer() -> None:
+    """Stop the writer and flush whatever is still queued"""
+    global _request_log_queue, _request_log_writer
+
+    if _request_log_writer is None:
+        return
+    _request_log_writer.cancel()
+    try:
+        await _request_log_writer
+    except asyncio.CancelledError:
+        pass
+
+    queue = _request_log_queue
+    _request_log_queue = None
+    _request_log_writer = None
+    while not queue.empty():
+        _write_request_log(queue.get_nowait())
 
 
 def log_auth_event(
@@ -9,7 +9,9 @@ from app.admin.router import router as admin_router
 from app.appointments.routers import appointment_router
 from app.auth.router import router as auth_router
 from app.config import get_settings
+from app.core.emails.services import close_email_client, warm_email_templates
 from app.database import database
+from app.loggs import start_request_log_writer, stop_request_log_writer
 from app.office_mgnt.router import hostavailableroutes
 from app.office_mgnt.router import router as office_router
 from app.status.routes import router as status_router
@@ -20,11 +22,17 @@ settings = get_settings()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup: connect to database
+    # Startup: connect to database, compile email templates and start the
+    # background request log writer
     await database.connect()
+    warm_email_templates()
+    start_request_log_writer()
     yield
-    # Shutdown: disconnect from database
+    # Shutdown: disconnect from database, close pooled HTTP clients and
+    # flush queued request logs
     await database.disconnect()
+    await close_email_client()
+    await stop_request_log_writer()
 
 
 def custom_generate_unique_id(route: APIRoute) -> str:
@@ -43,7 +51,10 @@ app = FastAPI(
 
 # Set all CORS enabled origins
 # Strip trailing slashes as AnyUrl adds them but browsers send Origin without trailing slash
-cors_origins = [str(origin).rstrip("/") for origin in settings.BACKEND_CORS_ORIGINS]
+# A frozenset keeps Starlette's per-request origin check O(1)
+cors_origins = frozenset(
+    str(origin).rstrip("/") for origin in settings.BACKEND_CORS_ORIGINS
+)
 if cors_origins:
     app.add_middleware(
         CORSMiddleware,
@@ -51,6 +62,8 @@ if cors_origins:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        # Let browsers reuse preflight results (Chrome caps this at 2h)
+        max_age=86400,
     )
 
 # Health check endpoint (no auth required)
@@ -36,7 +36,7 @@ from app.office_mgnt.schemas import (
     OfficeRead,
     OfficeUpdate,
 )
-from app.office_mgnt.utils import generate_slots, has_excluded_role
+from app.office_mgnt.utils import generate_slots, users_with_excluded_role
 
 
 async def _log_admin_action(
@@ -1085,13 +1085,12 @@ class OfficeMembershipService:
         List all members of a given office, excluding secretaries and receptions by role.
         """
         members = await OfficeMembershipMgmtCRUD.get_members_by_office(db, office_id)
+        if not members:
+            return []
 
-        filtered_members = []
-        for m in members:
-            if not await has_excluded_role(db, m["user_id"]):
-                filtered_members.append(m)
+        excluded = await users_with_excluded_role(db, [m["user_id"] for m in members])
 
-        return [MembershipRead(**m) for m in filtered_members]
+        return [MembershipRead(**m) for m in members if m["user_id"] not in excluded]
 
     @staticmethod
     async def update_office_member(
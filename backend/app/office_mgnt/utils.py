@@ -3,17 +3,46 @@ from enum import Enum
 from uuid import UUID
 
 from databases import Database
+from sqlalchemy import and_, func, or_, select
 
-from app.auth.rbac import RBACCRUD
+from app.auth.models import roles, user_roles
 
+EXCLUDED_HOST_ROLES = ("secretary", "secretry", "reception")
+
+
+async def users_with_excluded_role(
+    session: Database, user_ids: list[UUID]
+) -> set[UUID]:
+    """Return which of ``user_ids`` hold an active secretary/reception role.
+
+    Same active/expiry rules as RBACCRUD.get_user_roles, but one query for
+    the whole batch instead of one per user.
+    """
+    if not user_ids:
+        return set()
+    query = (
+        select(user_roles.c.user_id)
+        .select_from(user_roles.join(roles, user_roles.c.role_id == roles.c.id))
+        .where(
+            and_(
+                user_roles.c.user_id.in_(user_ids),
+                user_roles.c.is_active.is_(True),
+                roles.c.is_active.is_(True),
+                or_(
+                    user_roles.c.expires_at.is_(None),
+                    user_roles.c.expires_at > func.now(),
+                ),
+                func.lower(roles.c.name).in_(EXCLUDED_HOST_ROLES),
+            )
+        )
+        .distinct()
+    )
+    rows = await session.fetch_all(query)
+    return {row["user_id"] for row in rows}
 
-async def has_excluded_role(session: Database, user_id: UUID) -> bool:
-    excluded_roles = ["secretary", "secretry", "reception"]
-    user_roles = await RBACCRUD.get_user_roles(session, user_id)
-    role_names = [r.get("name", "").lower() for r in user_roles] if user_roles else []
 
-    # exclude if any of the roles match
-    return any(role in excluded_roles for role in role_names)
+async def has_excluded_role(session: Database, user_id: UUID) -> bool:
+    return user_id in await users_with_excluded_role(session, [user_id])
 
 
 class Daysofweek(str, Enum):
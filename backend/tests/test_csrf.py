@@ -0,0 +1,94 @@
+"""
+Unit tests for the stateless CSRF token helpers.
+"""
+
+import io
+
+import pytest
+from fastapi import HTTPException, Request, UploadFile
+
+from app.core import csrf
+from app.core.csrf import (
+    generate_csrf_token,
+    validate_csrf_token,
+    verify_csrf_token,
+)
+
+pytestmark = pytest.mark.unit
+
+SESSION_ID = "session-123"
+
+
+def test_valid_token_round_trips():
+    """A freshly generated token verifies for the same session"""
+    token = generate_csrf_token(SESSION_ID)
+    assert verify_csrf_token(token, SESSION_ID) is True
+
+
+def test_expired_token_is_rejected(monkeypatch: pytest.MonkeyPatch):
+    """A token is rejected once its TTL has passed"""
+    token = generate_csrf_token(SESSION_ID)
+    expires_at = int(token.partition(".")[0])
+
+    monkeypatch.setattr(csrf.time, "time", lambda: expires_at + 1)
+    assert verify_csrf_token(token, SESSION_ID) is False
+
+
+def test_tampered_signature_is_rejected():
+    """Changing any character of the signature invalidates the token"""
+    token = generate_csrf_token(SESSION_ID)
+    tampered = token[:-1] + ("0" if token[-1] != "0" else "1")
+    assert verify_csrf_token(tampered, SESSION_ID) is False
+
+
+def test_tampered_expiry_is_rejected():
+    """Extending the expiry without re-signing invalidates the token"""
+    token = generate_csrf_token(SESSION_ID)
+    expires_at, _, signature = token.partition(".")
+    assert verify_csrf_token(f"{int(expires_at) + 60}.{signature}", SESSION_ID) is False
+
+
+def test_token_for_other_session_is_rejected():
+    """A token signed for one session cannot be replayed on another"""
+    token = generate_csrf_token("other-session")
+    assert verify_csrf_token(token, SESSION_ID) is False
+
+
+@pytest.mark.parametrize("token", ["abc", "", ".", "123", "not-a-number.deadbeef"])
+def test_malformed_token_returns_false(token: str):
+    """Malformed tokens are rejected without raising"""
+    assert verify_csrf_token(token, SESSION_ID) is False
+
+
+def test_missing_session_id_is_rejected():
+    """Verification requires a session id"""
+    token = generate_csrf_token(SESSION_ID)
+    assert verify_csrf_token(token, "") is False
+
+
+def test_non_ascii_signature_returns_false():
+    """Non-ASCII header text is rejected instead of raising TypeError"""
+    expires_at = generate_csrf_token(SESSION_ID).partition(".")[0]
+    assert verify_csrf_token(f"{expires_at}.é", SESSION_ID) is False
+
+
+@pytest.mark.parametrize("token", [None, 123, b"123.abc", UploadFile(io.BytesIO())])
+def test_non_str_token_returns_false(token):
+    """Non-string values, e.g. an uploaded file under csrf_token, are rejected"""
+    assert verify_csrf_token(token, SESSION_ID) is False
+
+
+async def test_validate_rejects_non_ascii_header_with_403():
+    """A malformed X-CSRF-Token header is a 403, not a server error"""
+    expires_at = generate_csrf_token(SESSION_ID).partition(".")[0]
+    request = Request(
+        {
+            "type": "http",
+            "method": "POST",
+            "path": "/",
+            "headers": [(b"x-csrf-token", f"{expires_at}.\xe9".encode("latin-1"))],
+        }
+    )
+    with pytest.raises(HTTPException) as exc_info:
+        await validate_csrf_token(request, SESSION_ID)
+    assert exc_info.value.status_code == 403
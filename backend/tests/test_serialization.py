@@ -0,0 +1,106 @@
+"""
+Unit tests for convert_to_json_serializable.
+
+Every case runs through both the orjson round trip and the pure-Python
+walk, so the two paths cannot drift apart.
+"""
+
+import uuid
+from dataclasses import dataclass
+from datetime import UTC, date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from enum import Enum
+
+import pytest
+
+from app.core.serialization import (
+    _convert_to_json_serializable,
+    convert_to_json_serializable,
+)
+
+pytestmark = pytest.mark.unit
+
+USER_ID = uuid.UUID("12345678-1234-5678-1234-567812345678")
+
+
+class Color(Enum):
+    RED = "red"
+
+
+@dataclass
+class Point:
+    x: int
+    y: int
+
+
+@pytest.fixture(params=["orjson", "fallback"])
+def convert(request):
+    if request.param == "orjson":
+        return convert_to_json_serializable
+    return _convert_to_json_serializable
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        (USER_ID, "12345678-1234-5678-1234-567812345678"),
+        (datetime(2024, 1, 2, 3, 4, 5, 600), "2024-01-02T03:04:05.000600"),
+        (datetime(2024, 1, 2, 3, 4, 5, tzinfo=UTC), "2024-01-02T03:04:05+00:00"),
+        (
+            datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone(timedelta(hours=3))),
+            "2024-01-02T03:04:05+03:00",
+        ),
+        (date(2024, 1, 2), "2024-01-02"),
+        (time(3, 4, 5), "03:04:05"),
+        (Decimal("1.5"), 1.5),
+        (Color.RED, "red"),
+        ("text", "text"),
+        (7, 7),
+        (True, True),
+        (None, None),
+    ],
+)
+def test_leaf_conversions(convert, value, expected):
+    assert convert({"value": value}) == {"value": expected}
+
+
+@pytest.mark.parametrize("value", [float("nan"), float("inf"), Decimal("NaN")])
+def test_non_finite_floats_become_none(convert, value):
+    assert convert({"value": value}) == {"value": None}
+
+
+def test_containers_become_lists(convert):
+    result = convert({"t": (1, USER_ID), "s": {USER_ID}, "f": frozenset({USER_ID})})
+    assert result == {"t": [1, str(USER_ID)], "s": [str(USER_ID)], "f": [str(USER_ID)]}
+
+
+def test_nested_structures(convert):
+    data = {"items": [{"id": USER_ID, "tags": [Color.RED]}]}
+    assert convert(data) == {"items": [{"id": str(USER_ID), "tags": ["red"]}]}
+
+
+def test_non_str_keys_are_preserved():
+    result = convert_to_json_serializable({1: "a", USER_ID: "b", "c": USER_ID})
+    assert result == {1: "a", USER_ID: "b", "c": str(USER_ID)}
+    assert list(result) == [1, USER_ID, "c"]
+
+
+def test_key_types_do_not_depend_on_other_values():
+    """An unencodable value elsewhere must not change how keys come out"""
+    marker = object()
+    assert convert_to_json_serializable({1: "a"}) == {1: "a"}
+    assert convert_to_json_serializable({1: "a", "x": marker}) == {1: "a", "x": marker}
+
+
+def test_unknown_objects_and_dataclasses_pass_through():
+    marker = object()
+    point = Point(1, 2)
+    result = convert_to_json_serializable({"m": marker, "p": point, "id": USER_ID})
+    assert result["m"] is marker
+    assert result["p"] is point
+    assert result["id"] == str(USER_ID)
+
+
+def test_orjson_and_fallback_agree_on_nan_alongside_unknown_values():
+    result = convert_to_json_serializable({"n": float("nan"), "m": object()})
+    assert result["n"] is None